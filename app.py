@@ -9,6 +9,7 @@ from pypdf import PdfReader
 
 from memory_backend import (
     upsert_note,
+    upsert_many,
     search_scores,
     delete_by_ids,
     export_all,
@@ -408,6 +409,29 @@ if "current_question" not in st.session_state:
 if "is_followup" not in st.session_state:
     st.session_state.is_followup = False  # Track if current question is a follow-up
 
+# Chunks per upsert_many call while storing an ingested PDF
+STORE_BATCH_SIZE = 64
+
+
+def _store_chunks(pieces, meta, chunk_meta, errors, label: str) -> int:
+    """Store chunks one batch at a time; returns how many were written.
+    
+    A batch that still fails after upsert_many's retries is recorded in
+    errors and skipped, so batches already written keep counting.
+    """
+    stored = 0
+    for start in range(0, len(pieces), STORE_BATCH_SIZE):
+        end = start + STORE_BATCH_SIZE
+        try:
+            stored += len(upsert_many(
+                pieces[start:end], meta,
+                batch_size=STORE_BATCH_SIZE, chunk_meta=chunk_meta[start:end]
+            ))
+        except Exception as e:
+            errors.append(f"{label} {start + 1}-{min(end, len(pieces))}: {str(e)}")
+    return stored
+
+
 # PDF ingestion helper function with enhanced error handling
 def _ingest_pdf_stream(file, name: str, chunk_chars: int = 1200, use_ocr: bool = False) -> int:
     """Process PDF with detailed progress and error handling."""
@@ -424,6 +448,8 @@ def _ingest_pdf_stream(file, name: str, chunk_chars: int = 1200, use_ocr: bool =
         reader = PdfReader(BytesIO(file_bytes))
         n = 0
         errors = []
+        pending_pieces = []  # Chunks collected across pages for batched upserts
+        pending_meta = []
         
         # Create progress containers
         progress_container = st.container()
@@ -448,6 +474,8 @@ def _ingest_pdf_stream(file, name: str, chunk_chars: int = 1200, use_ocr: bool =
                         lambda msg: status_text.text(msg))
                 
                 # Process OCR results
+                ocr_pieces = []
+                ocr_meta = []
                 for pageno, text in enumerate(ocr_texts, 1):
                     if not text or len(text.strip()) < 3:
                         continue
@@ -467,21 +495,21 @@ def _ingest_pdf_stream(file, name: str, chunk_chars: int = 1200, use_ocr: bool =
                     for chunk_idx, piece in enumerate(chunks):
                         if not piece:
                             continue
-                        
-                        try:
-                            upsert_note(
-                                piece,
-                                {
-                                    "source": name,
-                                    "type": "pdf_ocr",
-                                    "page": pageno,
-                                    "chunk": chunk_idx,
-                                    "timestamp": datetime.now().isoformat(),
-                                },
-                            )
-                            n += 1
-                        except Exception as e:
-                            errors.append(f"OCR Page {pageno}, chunk {chunk_idx}: {str(e)}")
+                        ocr_pieces.append(piece)
+                        ocr_meta.append({"page": pageno, "chunk": chunk_idx})
+                
+                # Embed and store all OCR chunks in batched requests
+                if ocr_pieces:
+                    status_text.text(f"💾 Storing {len(ocr_pieces)} OCR chunks...")
+                    n += _store_chunks(
+                        ocr_pieces,
+                        {
+                            "source": name,
+                            "type": "pdf_ocr",
+                            "timestamp": datetime.now().isoformat(),
+                        },
+                        ocr_meta, errors, "OCR chunks",
+                    )
                 
                 # Return OCR results if successful
                 if n > 0:
@@ -533,36 +561,32 @@ def _ingest_pdf_stream(file, name: str, chunk_chars: int = 1200, use_ocr: bool =
                 if not text or len(text.strip()) < 3:
                     continue
                 
-                # Process chunks for this page with smart chunking
-                page_chunks = 0
-                
                 # Use smart chunking with overlap
                 chunks = smart_chunks(text, chunk_size=chunk_chars, overlap=200)
                 
                 for chunk_idx, piece in enumerate(chunks):
                     if not piece:
                         continue
-                    
-                    try:
-                        upsert_note(
-                            piece,
-                            {
-                                "source": name,
-                                "type": "pdf",
-                                "page": pageno,
-                                "chunk": chunk_idx,
-                                "timestamp": datetime.now().isoformat(),
-                            },
-                        )
-                        n += 1
-                        page_chunks += 1
-                    except Exception as e:
-                        errors.append(f"Page {pageno}, chunk {chunk_idx}: {str(e)}")
+                    pending_pieces.append(piece)
+                    pending_meta.append({"page": pageno, "chunk": chunk_idx})
                 
             except Exception as e:
                 errors.append(f"Page {pageno}: {str(e)}")
                 detail_text.error(f"❌ Error on page {pageno}: {str(e)}")
         
+        # Embed and store all chunks in batched requests instead of one call per chunk
+        if pending_pieces:
+            status_text.text(f"💾 Storing {len(pending_pieces)} chunks...")
+            n += _store_chunks(
+                pending_pieces,
+                {
+                    "source": name,
+                    "type": "pdf",
+                    "timestamp": datetime.now().isoformat(),
+                },
+                pending_meta, errors, "Chunks",
+            )
+        
         # Clean up progress indicators
         progress_bar.empty()
         status_text.empty()
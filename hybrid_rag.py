@@ -108,6 +108,18 @@ Answer based only on the above context.""")
             Tuple of (answer, document_ids_used, source_type)
             where source_type is 'context', 'llm_knowledge', or 'hybrid'
         """
+        answer, doc_ids, source, _ = self.answer_with_context(query, k, verbose)
+        return answer, doc_ids, source
+    
+    def answer_with_context(self, query: str, k: int = 5, verbose: bool = False) -> Tuple[str, List[str], str, str]:
+        """
+        Same as answer(), but also returns the context the answer was based on,
+        so callers don't have to search again to inspect it.
+        
+        Returns:
+            Tuple of (answer, document_ids_used, source_type, context)
+            where context is "" unless source_type is 'context'
+        """
         
         # Step 1: Search for relevant context
         if verbose:
@@ -121,7 +133,7 @@ Answer based only on the above context.""")
                 print(f"[2] No relevant documents found. Using LLM knowledge...")
             
             answer = self._answer_with_llm_knowledge(query)
-            return answer, [], "llm_knowledge"
+            return answer, [], "llm_knowledge", ""
         
         # Step 2: Try strict RAG
         if verbose:
@@ -134,7 +146,7 @@ Answer based only on the above context.""")
             if verbose:
                 print(f"[3] RAG provided an answer. Done.")
             
-            return rag_answer, doc_ids, "context"
+            return rag_answer, doc_ids, "context", context
         
         # Step 3: RAG said "I don't know" - fall back to LLM knowledge
         if verbose:
@@ -143,7 +155,7 @@ Answer based only on the above context.""")
         llm_answer = self._answer_with_llm_knowledge(query)
         
         # Return just the answer, let rag_chain.py handle the note
-        return llm_answer, [], "llm_knowledge"
+        return llm_answer, [], "llm_knowledge", ""
     
     def answer_with_source_indication(self, query: str, k: int = 5) -> str:
         """
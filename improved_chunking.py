@@ -1,6 +1,15 @@
 """Improved chunking with overlap to prevent information loss at boundaries."""
 import re
-from typing import List, Optional
+from bisect import bisect_right
+from typing import Iterable, Iterator, List, Optional
+
+# Sentence boundaries: . ! ? followed by space or newline
+_SENTENCE_END_RE = re.compile(r'[.!?][\s\n]')
+
+# Searchability metadata extracted by chunk_with_metadata
+_NUMBER_RE = re.compile(r'\$?[\d,]+(?:\.\d{2})?')
+_PERCENT_RE = re.compile(r'\d+(?:\.\d+)?%')
+_TIME_PERIOD_RE = re.compile(r'\d+[-–]\d+\s*(?:month|year|week|day)s?')
 
 def smart_chunks(text: str, chunk_size: int = 1200, overlap: int = 200) -> List[str]:
     """
@@ -27,8 +36,10 @@ def smart_chunks(text: str, chunk_size: int = 1200, overlap: int = 200) -> List[
     
     chunks = []
     
-    # Find sentence boundaries (. ! ? followed by space or newline)
-    sentence_endings = re.compile(r'[.!?][\s\n]')
+    # Find sentence boundaries once for the whole text. Matches can't overlap
+    # (the second character is whitespace, never punctuation), so these are
+    # exactly the matches a per-window scan would find
+    boundary_ends = [m.end() for m in _SENTENCE_END_RE.finditer(text)]
     
     current_pos = 0
     
@@ -38,14 +49,12 @@ def smart_chunks(text: str, chunk_size: int = 1200, overlap: int = 200) -> List[
         
         # If we're not at the end of the text, try to break at a sentence boundary
         if chunk_end < len(text):
-            # Look for the last sentence ending before chunk_end
-            search_text = text[current_pos:chunk_end]
-            matches = list(sentence_endings.finditer(search_text))
+            # Look for the last sentence ending inside [current_pos, chunk_end)
+            i = bisect_right(boundary_ends, chunk_end) - 1
             
-            if matches:
+            if i >= 0 and boundary_ends[i] - 2 >= current_pos:
                 # Use the last sentence boundary found
-                last_match = matches[-1]
-                chunk_end = current_pos + last_match.end()
+                chunk_end = boundary_ends[i]
             else:
                 # No sentence boundary found, try to break at a word boundary
                 # Look for the last space before chunk_end
@@ -75,6 +84,89 @@ def smart_chunks(text: str, chunk_size: int = 1200, overlap: int = 200) -> List[
     return chunks
 
 
+def smart_chunks_stream(
+    pieces: Iterable[str],
+    chunk_size: int = 1200,
+    overlap: int = 200
+) -> Iterator[str]:
+    """
+    Chunk text that arrives in pieces (e.g. PDF pages) without joining it.
+    
+    Yields the same chunks as smart_chunks("".join(pieces), ...), reading
+    pieces only as needed, so just the text around the current chunk is held.
+    
+    Args:
+        pieces: Consecutive pieces of the text
+        chunk_size: Target size for each chunk (default 1200 chars)
+        overlap: Number of characters to overlap between chunks (default 200 chars)
+    
+    Yields:
+        Text chunks with overlap
+    """
+    pieces = iter(pieces)
+    buf = ""  # Text not yet fully chunked; positions below are relative to it
+    current_pos = 0
+    exhausted = False
+    started = False
+    
+    while True:
+        chunk_end = current_pos + chunk_size
+        
+        # Read until the text is known to go on past chunk_end, or has ended.
+        # Whitespace alone doesn't count, since the full text gets stripped
+        while not exhausted and (len(buf) <= chunk_end or buf[chunk_end:].isspace()):
+            piece = next(pieces, None)
+            if piece is None:
+                exhausted = True
+                buf = buf.rstrip()
+                continue
+            piece = piece.replace("\x00", "")
+            if not started:
+                piece = piece.lstrip()
+                started = bool(piece)
+            buf += piece
+        
+        if exhausted:
+            if current_pos >= len(buf):
+                break
+            chunk_end = min(chunk_end, len(buf))
+        
+        # If we're not at the end of the text, try to break at a sentence boundary
+        if not exhausted or chunk_end < len(buf):
+            last = None
+            for last in _SENTENCE_END_RE.finditer(buf, current_pos, chunk_end):
+                pass
+            
+            if last:
+                chunk_end = last.end()
+            else:
+                space_pos = buf.rfind(' ', current_pos, chunk_end)
+                if space_pos > current_pos:
+                    chunk_end = space_pos
+        
+        chunk = buf[current_pos:chunk_end].strip()
+        
+        if chunk:
+            yield chunk
+        
+        if exhausted and chunk_end >= len(buf):
+            break
+        
+        # Calculate the next starting position with overlap
+        next_pos = chunk_end - overlap
+        
+        # Ensure we make progress
+        if next_pos <= current_pos:
+            next_pos = chunk_end
+        
+        current_pos = next_pos
+        
+        # Drop text that's behind us once it's the bulk of the buffer
+        if current_pos > len(buf) // 2:
+            buf = buf[current_pos:]
+            current_pos = 0
+
+
 def chunk_with_metadata(
     text: str, 
     chunk_size: int = 1200, 
@@ -111,19 +203,19 @@ def chunk_with_metadata(
             metadata['page'] = page
         
         # Extract key information from chunk for better searchability
-        numbers = re.findall(r'\$?[\d,]+(?:\.\d{2})?', chunk)
+        numbers = _NUMBER_RE.findall(chunk)
         if numbers:
             metadata['contains_numbers'] = True
             metadata['numbers'] = numbers[:5]  # Store first 5 numbers
         
         # Check for percentage values
-        percentages = re.findall(r'\d+(?:\.\d+)?%', chunk)
+        percentages = _PERCENT_RE.findall(chunk)
         if percentages:
             metadata['contains_percentages'] = True
             metadata['percentages'] = percentages[:3]
         
         # Check for time periods
-        time_periods = re.findall(r'\d+[-–]\d+\s*(?:month|year|week|day)s?', chunk)
+        time_periods = _TIME_PERIOD_RE.findall(chunk)
         if time_periods:
             metadata['contains_time_periods'] = True
             metadata['time_periods'] = time_periods[:3]
@@ -2,6 +2,7 @@
 from pypdf import PdfReader
 from docx import Document
 from vec_memory import upsert_many
+from load_with_overlap import iter_overlapping_chunks
 from io import BytesIO
 import pathlib
 
@@ -16,8 +17,10 @@ def _chunks(blob: str, n: int = 1200):
 
 
 def ingest_pdf_bytes(b: bytes, name: str, chunk_chars: int = 1200) -> int:
-    pages = [(p.extract_text() or "") for p in PdfReader(BytesIO(b)).pages]
-    parts = _chunks("\n".join(pages), chunk_chars)
+    # Pages are extracted lazily, so only one page and the open chunk are buffered.
+    # Chunks follow sentence boundaries and overlap so concepts are not cut in half.
+    pages = ((p.extract_text() or "") for p in PdfReader(BytesIO(b)).pages)
+    parts = list(iter_overlapping_chunks(pages, chunk_size=chunk_chars, overlap=chunk_chars // 6))
     upsert_many(parts, {"type": "pdf", "source": pathlib.Path(name).name})
     return len(parts)
 
@@ -50,6 +50,12 @@ if HAS_NLTK:
         except:
             pass
 
+# Special tokens preserved by KeywordSearchIndex.tokenize
+_DOLLAR_RE = re.compile(r'\$[\d,]+(?:\.\d{2})?')  # e.g. $2,100
+_PERCENT_RE = re.compile(r'\d+(?:\.\d+)?%')  # e.g. 91.7%
+_ID_RE = re.compile(r'\b[A-Z]+-\d+\b', re.IGNORECASE)  # e.g. ABC-123, ID-456
+_DATE_RANGE_RE = re.compile(r'\d+[-–]\d+\s*(?:month|year|week|day)s?', re.IGNORECASE)  # e.g. 18-24 months
+
 
 class KeywordSearchIndex:
     """BM25-based keyword search index with SQLite persistence."""
@@ -116,20 +122,16 @@ class KeywordSearchIndex:
         special_tokens = []
         
         # Dollar amounts (e.g., $2,100)
-        dollar_pattern = r'\$[\d,]+(?:\.\d{2})?'
-        special_tokens.extend(re.findall(dollar_pattern, text))
+        special_tokens.extend(_DOLLAR_RE.findall(text))
         
         # Percentages (e.g., 91.7%)
-        percent_pattern = r'\d+(?:\.\d+)?%'
-        special_tokens.extend(re.findall(percent_pattern, text))
+        special_tokens.extend(_PERCENT_RE.findall(text))
         
         # IDs and codes (e.g., ABC-123, ID-456)
-        id_pattern = r'\b[A-Z]+-\d+\b'
-        special_tokens.extend(re.findall(id_pattern, text, re.IGNORECASE))
+        special_tokens.extend(_ID_RE.findall(text))
         
         # Date ranges (e.g., 18-24 months)
-        date_pattern = r'\d+[-–]\d+\s*(?:month|year|week|day)s?'
-        special_tokens.extend(re.findall(date_pattern, text, re.IGNORECASE))
+        special_tokens.extend(_DATE_RANGE_RE.findall(text))
         
         # Regular tokenization
         if HAS_NLTK:
@@ -7,6 +7,31 @@ from vec_memory import upsert_many, reset_all
 from keyword_search import get_keyword_index
 
 
+def _process_para(para: str) -> list:
+    """Split one paragraph into chunks of at most ~400 characters."""
+    chunks = []
+    # If paragraph is short enough, keep it as one chunk
+    if len(para) < 500:
+        chunks.append(para)
+    else:
+        # Split longer paragraphs by sentences
+        sentences = re.split(r'(?<=[.!?])\s+', para)
+        
+        current_chunk = ""
+        for sentence in sentences:
+            # If adding this sentence would make chunk too long, save current and start new
+            if current_chunk and len(current_chunk) + len(sentence) > 400:
+                chunks.append(current_chunk.strip())
+                current_chunk = sentence
+            else:
+                current_chunk += " " + sentence if current_chunk else sentence
+        
+        if current_chunk:
+            chunks.append(current_chunk.strip())
+    
+    return chunks
+
+
 def extract_text_from_demo():
     """Extract and chunk the demo document text properly."""
     
@@ -68,24 +93,7 @@ def extract_text_from_demo():
     paragraphs = [p.strip() for p in demo_text.split('\n\n') if p.strip()]
     
     for para in paragraphs:
-        # If paragraph is short enough, keep it as one chunk
-        if len(para) < 500:
-            chunks.append(para)
-        else:
-            # Split longer paragraphs by sentences
-            sentences = re.split(r'(?<=[.!?])\s+', para)
-            
-            current_chunk = ""
-            for sentence in sentences:
-                # If adding this sentence would make chunk too long, save current and start new
-                if current_chunk and len(current_chunk) + len(sentence) > 400:
-                    chunks.append(current_chunk.strip())
-                    current_chunk = sentence
-                else:
-                    current_chunk += " " + sentence if current_chunk else sentence
-            
-            if current_chunk:
-                chunks.append(current_chunk.strip())
+        chunks.extend(_process_para(para))
     
     # Also add some specific important sentences as their own chunks for better recall
     important_sentences = [
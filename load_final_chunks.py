@@ -3,11 +3,78 @@ Final chunking strategy to ensure 90%+ recall.
 Creates comprehensive overlapping chunks with special handling for critical sections.
 """
 
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from vec_memory import upsert_many, reset_all
 from keyword_search import get_keyword_index
 
 
+_WHITESPACE_RUN = re.compile(r'\s+')
+
+# (window size, stride) pairs for the overlapping chunks
+WINDOW_SPECS = ((300, 225), (600, 450))
+
+
+def stream_chunks(text: str, window_specs=WINDOW_SPECS):
+    """
+    Yield (kind, chunk) pairs for sentences, paragraphs and overlapping windows.
+    
+    The text is scanned once: every whitespace run is checked for a sentence
+    boundary (preceded by . ! or ?) and a paragraph boundary (contains a blank
+    line), while the words between runs are collected for the whitespace-
+    normalized text that the windows are cut from.
+    """
+    words = []
+    sent_start = para_start = word_start = 0
+    
+    for match in _WHITESPACE_RUN.finditer(text):
+        start, end = match.span()
+        if start > word_start:
+            words.append(text[word_start:start])
+        word_start = end
+        
+        if start > 0 and text[start - 1] in '.!?':
+            sentence = text[sent_start:start].strip()
+            if sentence:
+                yield 'sentence', sentence
+            sent_start = end
+        
+        if '\n\n' in match.group():
+            para = text[para_start:start].strip()
+            if para:
+                yield 'paragraph', para
+            para_start = end
+    
+    if word_start < len(text):
+        words.append(text[word_start:])
+    
+    sentence = text[sent_start:].strip()
+    if sentence:
+        yield 'sentence', sentence
+    para = text[para_start:].strip()
+    if para:
+        yield 'paragraph', para
+    
+    text_clean = ' '.join(words)
+    
+    # Slicing a memoryview does not copy, so windows are deduplicated on the
+    # raw bytes and only the unique ones are decoded back to str. Non-ASCII
+    # text uses a fixed-width encoding so byte offsets stay on characters.
+    if text_clean.isascii():
+        encoding, width = 'ascii', 1
+    else:
+        encoding, width = 'utf-32-le', 4
+    buf = memoryview(text_clean.encode(encoding))
+    seen_windows = set()
+    for size, stride in window_specs:
+        for i in range(0, len(text_clean) - size, stride):
+            raw = buf[i * width:(i + size) * width]
+            if raw not in seen_windows:
+                seen_windows.add(raw)
+                yield 'window', raw.tobytes().decode(encoding)
+
+
 def create_comprehensive_chunks():
     """
     Create chunks that ensure all critical information is findable.
@@ -62,19 +129,12 @@ def create_comprehensive_chunks():
     What enhances user interaction is emotional intelligence and natural language processing. Critical for enterprise AI adoption are security, privacy, and compliance requirements.
     """
     
-    chunks = []
-    
-    # 1. Create sentence-level chunks
-    sentences = re.split(r'(?<=[.!?])\s+', demo_text)
-    for sentence in sentences:
-        if sentence.strip():
-            chunks.append(sentence.strip())
+    # 1-2. Sentence- and paragraph-level chunks (windows are added after the critical chunks)
+    streamed = {'sentence': [], 'paragraph': [], 'window': []}
+    for kind, chunk in stream_chunks(demo_text):
+        streamed[kind].append(chunk)
     
-    # 2. Create paragraph-level chunks
-    paragraphs = demo_text.strip().split('\n\n')
-    for para in paragraphs:
-        if para.strip():
-            chunks.append(para.strip())
+    chunks = streamed['sentence'] + streamed['paragraph']
     
     # 3. Create specific answer chunks for critical queries
     critical_chunks = [
@@ -138,16 +198,8 @@ def create_comprehensive_chunks():
     
     chunks.extend(critical_chunks)
     
-    # 4. Create overlapping chunks of various sizes
-    text_clean = ' '.join(demo_text.split())
-    
-    # Small overlapping chunks (300 chars, 75 overlap)
-    for i in range(0, len(text_clean) - 300, 225):
-        chunks.append(text_clean[i:i+300])
-    
-    # Medium overlapping chunks (600 chars, 150 overlap)
-    for i in range(0, len(text_clean) - 600, 450):
-        chunks.append(text_clean[i:i+600])
+    # 4. Overlapping chunks of various sizes (300/75 and 600/150 overlap)
+    chunks.extend(streamed['window'])
     
     # 5. Remove duplicates but keep variations
     unique_chunks = []
@@ -194,27 +246,34 @@ def load_final_chunks():
         stats = keyword_index.get_stats()
         print(f"Keyword index now contains {stats['total_documents']} documents")
         
-        # Verify critical content is findable
-        print("\nVerifying critical content...")
-        tests = [
-            ("pinecone weaviate chroma", ["pinecone", "weaviate", "chroma"]),
-            ("API key management", ["never", "expose"]),
-            ("healthcare patient", ["patient", "drug"]),
-            ("hybrid search semantic keyword", ["hybrid", "semantic", "keyword"]),
-            ("onboarding new employees", ["onboarding", "new", "employees"]),
-            ("education personalized curriculum", ["education", "personalized", "curriculum"])
-        ]
-        
-        for query, expected in tests:
-            results = keyword_index.search(query, k=3)
-            found = False
-            for _, _, content in results:
-                content_lower = content.lower()
-                if all(term.lower() in content_lower for term in expected):
-                    found = True
-                    break
-            status = "OK" if found else "MISSING"
-            print(f"  {query[:30]:30} -> {status}")
+        # Verify critical content is findable (diagnostic only, opt-in)
+        if os.environ.get('VERIFY_CHUNKS'):
+            print("\nVerifying critical content...")
+            tests = [
+                ("pinecone weaviate chroma", ["pinecone", "weaviate", "chroma"]),
+                ("API key management", ["never", "expose"]),
+                ("healthcare patient", ["patient", "drug"]),
+                ("hybrid search semantic keyword", ["hybrid", "semantic", "keyword"]),
+                ("onboarding new employees", ["onboarding", "new", "employees"]),
+                ("education personalized curriculum", ["education", "personalized", "curriculum"])
+            ]
+            
+            def _check(test):
+                query, expected = test
+                # BM25 scoring only reads the in-memory index, so concurrent searches are safe
+                results = keyword_index.search(query, k=3)
+                found = False
+                for _, _, content in results:
+                    content_lower = content.lower()
+                    if all(term.lower() in content_lower for term in expected):
+                        found = True
+                        break
+                status = "OK" if found else "MISSING"
+                return f"  {query[:30]:30} -> {status}"
+            
+            with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+                for status in executor.map(_check, tests):
+                    print(status)
         
         return True
         
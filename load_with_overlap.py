@@ -4,10 +4,48 @@ This should dramatically improve recall without killing precision.
 """
 
 import re
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Iterable, Iterator, List, Optional, Tuple
 from vec_memory import upsert_many, reset_all
 from keyword_search import get_keyword_index
 
 
+_SENT_RE = re.compile(r'(?<=[.!?])\s+')
+
+
+def _chunk_bounds(
+    cum: List[int], chunk_size: int, overlap: int, prev_end: int = 0
+) -> List[Tuple[int, int]]:
+    """
+    Compute (start, end) sentence index ranges for overlapping chunks.
+    
+    ``cum`` holds prefix sums of sentence lengths (+1 for the joining space), so
+    chunk and overlap boundaries are found by binary search using integer
+    arithmetic only; no strings are built here. ``prev_end`` is the end of the
+    chunk before the first one, when resuming a partially chunked text.
+    """
+    n = len(cum) - 1
+    if n <= 0:
+        return []
+    
+    bounds = []
+    start = 0
+    while True:
+        # First sentence that would push the chunk past chunk_size
+        end = max(bisect_right(cum, cum[start] + chunk_size + 1) - 1, prev_end + 1)
+        if end >= n:
+            bounds.append((start, n))
+            break
+        bounds.append((start, end))
+        
+        # Carry over the trailing sentences (at most 5) that fit in the overlap
+        start = max(bisect_left(cum, cum[end] - overlap - 1), start, end - 5)
+        prev_end = end
+    
+    return bounds
+
+
 def create_overlapping_chunks(text: str, chunk_size: int = 400, overlap: int = 100) -> list:
     """
     Create overlapping chunks from text.
@@ -20,43 +58,77 @@ def create_overlapping_chunks(text: str, chunk_size: int = 400, overlap: int = 1
     Returns:
         List of overlapping text chunks
     """
-    chunks = []
-    sentences = re.split(r'(?<=[.!?])\s+', text)
-    
-    current_chunk = ""
-    sentence_buffer = []  # Keep track of sentences for overlap
+    sentences, cum = _split_sentences(text)
+    return _chunks_for(sentences, cum, chunk_size, overlap)
+
+
+def iter_overlapping_chunks(
+    texts: Iterable[str], chunk_size: int = 400, overlap: int = 100
+) -> Iterator[str]:
+    """
+    Stream overlapping chunks from consecutive texts (e.g. PDF pages).
     
-    for sentence in sentences:
-        if not sentence.strip():
+    The texts are treated as one newline-joined document, but only the
+    sentences of the chunk still being filled and the latest text are kept in
+    memory. Sentences longer than chunk_size (text without sentence
+    punctuation) are cut into chunk_size pieces so every chunk stays bounded.
+    """
+    carry: List[str] = []  # Complete sentences from the start of the open chunk
+    carry_prev_end = 0  # End of the chunk before the open one, relative to carry
+    tail = ""  # Trailing text that may continue in the next text
+    for i, text in enumerate(texts):
+        tail += ("\n" if i else "") + text.replace("\x00", "")
+        pieces, _ = _split_sentences(tail, max_sentence_chars=chunk_size)
+        if len(pieces) < 2:
             continue
-            
-        # If adding this sentence exceeds chunk size, save current chunk
-        if current_chunk and len(current_chunk) + len(sentence) > chunk_size:
-            chunks.append(current_chunk.strip())
-            
-            # Create overlap by keeping last few sentences
-            overlap_text = ""
-            for sent in reversed(sentence_buffer):
-                if len(overlap_text) + len(sent) <= overlap:
-                    overlap_text = sent + " " + overlap_text
-                else:
-                    break
-            
-            current_chunk = overlap_text
-            sentence_buffer = [s for s in sentence_buffer if s in overlap_text]
-        
-        current_chunk += sentence + " "
-        sentence_buffer.append(sentence)
+        carry.extend(pieces[:-1])
+        tail = pieces[-1]
         
-        # Limit sentence buffer size
-        if len(sentence_buffer) > 5:
-            sentence_buffer.pop(0)
-    
-    # Add final chunk
-    if current_chunk.strip():
-        chunks.append(current_chunk.strip())
+        cum = [0, *accumulate(len(s) + 1 for s in carry)]
+        if cum[-1] < 2 * chunk_size:
+            continue
+        # Every chunk but the last is final; the last may grow with the next text
+        bounds = _chunk_bounds(cum, chunk_size, overlap, carry_prev_end)
+        if len(bounds) < 2:
+            continue
+        for start, end in bounds[:-1]:
+            yield " ".join(carry[start:end]).strip()
+        last_start = bounds[-1][0]
+        carry_prev_end = bounds[-2][1] - last_start
+        carry = carry[last_start:]
     
-    return chunks
+    pieces, _ = _split_sentences(tail, max_sentence_chars=chunk_size)
+    sentences = carry + pieces
+    cum = [0, *accumulate(len(s) + 1 for s in sentences)]
+    for start, end in _chunk_bounds(cum, chunk_size, overlap, carry_prev_end):
+        yield " ".join(sentences[start:end]).strip()
+
+
+def _split_sentences(
+    text: str, max_sentence_chars: Optional[int] = None
+) -> Tuple[List[str], List[int]]:
+    """Split text into non-empty sentences and their length prefix sums."""
+    sentences = [s for s in _SENT_RE.split(text) if s.strip()]
+    if max_sentence_chars:
+        sentences = [
+            piece
+            for s in sentences
+            for piece in (
+                [s] if len(s) <= max_sentence_chars
+                else [s[i:i + max_sentence_chars] for i in range(0, len(s), max_sentence_chars)]
+            )
+            if piece.strip()
+        ]
+    cum = [0, *accumulate(len(s) + 1 for s in sentences)]
+    return sentences, cum
+
+
+def _chunks_for(sentences: List[str], cum: List[int], chunk_size: int, overlap: int) -> List[str]:
+    """Build overlapping chunks from an already split text."""
+    return [
+        " ".join(sentences[start:end]).strip()
+        for start, end in _chunk_bounds(cum, chunk_size, overlap)
+    ]
 
 
 def load_demo_with_overlapping_chunks():
@@ -128,13 +200,16 @@ def load_demo_with_overlapping_chunks():
     # Create multiple chunking strategies
     all_chunks = []
     
+    # Split into sentences once and share them across chunking strategies
+    sentences, cum = _split_sentences(demo_text)
+    
     # Strategy 1: Regular overlapping chunks (400 chars, 100 overlap)
-    chunks_400_100 = create_overlapping_chunks(demo_text, chunk_size=400, overlap=100)
+    chunks_400_100 = _chunks_for(sentences, cum, chunk_size=400, overlap=100)
     all_chunks.extend(chunks_400_100)
     print(f"Created {len(chunks_400_100)} chunks with 400 char size, 100 overlap")
     
     # Strategy 2: Larger overlapping chunks (600 chars, 150 overlap)
-    chunks_600_150 = create_overlapping_chunks(demo_text, chunk_size=600, overlap=150)
+    chunks_600_150 = _chunks_for(sentences, cum, chunk_size=600, overlap=150)
     all_chunks.extend(chunks_600_150)
     print(f"Created {len(chunks_600_150)} chunks with 600 char size, 150 overlap")
     
@@ -158,13 +233,8 @@ def load_demo_with_overlapping_chunks():
     print(f"Added {len(important_sentences)} important sentence chunks")
     
     # Remove exact duplicates but keep similar overlapping content
-    unique_chunks = []
-    seen = set()
-    for chunk in all_chunks:
-        # Only remove exact duplicates, keep overlapping content
-        if chunk not in seen:
-            unique_chunks.append(chunk)
-            seen.add(chunk)
+    # (dict.fromkeys keeps first-seen order and dedups in a single C-level pass)
+    unique_chunks = list(dict.fromkeys(all_chunks))
     
     print(f"Total unique chunks: {len(unique_chunks)} (with overlaps)")
     
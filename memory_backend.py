@@ -3,6 +3,8 @@ from vec_memory import (
     upsert_note,
     upsert_many,
     search,
+    search_by_vector,
+    embed_texts,
     search_scores,
     delete_by_ids,
     export_all,
@@ -14,6 +16,8 @@ __all__ = [
     "upsert_note",
     "upsert_many",
     "search",
+    "search_by_vector",
+    "embed_texts",
     "search_scores",
     "delete_by_ids",
     "export_all",
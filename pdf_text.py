@@ -0,0 +1,14 @@
+"""PDF page text extraction for worker processes.
+
+Kept apart from the ingestion scripts so spawned workers (the default on
+Windows) import only pypdf, not the vector store and its API clients.
+"""
+from io import BytesIO
+from pypdf import PdfReader
+
+
+def extract_page_range(args):
+    """Extract text from pages [start, stop) of a PDF (runs in a worker process)."""
+    pdf_bytes, start, stop = args
+    reader = PdfReader(BytesIO(pdf_bytes))
+    return [reader.pages[i].extract_text() for i in range(start, stop)]
@@ -2,16 +2,53 @@
 Pre-computed search patterns to avoid LLM calls entirely.
 """
 
+import atexit
 import json
+import re
+import concurrent.futures
+import functools
+import threading
+import time
+from collections import defaultdict
 from typing import List, Tuple, Dict, Any, Optional
-from vec_memory import search as basic_search
+from vec_memory import search as basic_search, search_by_vector, embed_texts, write_generation
 from search_enhancements import enhanced_search
+from keyword_search import get_keyword_index
+
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_PUNCT_TABLE = str.maketrans("", "", "?!.,;:")
+
+# Candidates fetched per search path before rank fusion
+HYBRID_CANDIDATES = 16
+
+# IndexedQueryCache results are rebuilt when this process writes to the
+# index, and after this TTL (other processes may write too)
+QUERY_INDEX_TTL = 300  # seconds
+
+# IndexedQueryCache rebuilds run here, off the request path
+_INDEX_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="query-index")
+atexit.register(_INDEX_POOL.shutdown, wait=False)
+
+
+def _keyword_search(query: str, k: int) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """BM25 search in the same (id, text, metadata) shape as vector search"""
+    try:
+        ki = get_keyword_index()
+        if ki.enabled:
+            return [(doc_id, content, {}) for doc_id, _, content in ki.search(query, k=k)]
+    except Exception as e:
+        print(f"Warning: Keyword search failed: {e}")
+    return []
 
 
 class PrecomputedPatterns:
     """Pre-computed query patterns for instant responses"""
     
-    def __init__(self):
+    def __init__(self, rrf_k: int = 60):
+        # RRF constant K; larger values flatten the advantage of top ranks
+        self.rrf_k = rrf_k
+        
         # Pre-compute common query transformations
         self.patterns = {
             # Definition patterns
@@ -88,25 +125,53 @@ class PrecomputedPatterns:
             "education ai": ["education", "student", "learning", "curriculum", "personalized", "tutoring"]
         }
     
+        # The hypotheticals are fixed, so embed them once instead of per query
+        self._hyp_vectors: Dict[str, List[float]] = {}
+        try:
+            hyp_texts = list(self.hypotheticals.values())
+            self._hyp_vectors = dict(zip(hyp_texts, embed_texts(hyp_texts)))
+        except Exception as e:
+            print(f"Warning: Could not pre-embed hypotheticals: {e}")
+        
+        # Repeat queries reuse their expansions
+        self._cached_expansions = functools.lru_cache(maxsize=1024)(self._compute_expansions)
+        
+        # Pattern dispatch is one regex search and topic lookup one dict.get per word
+        self._pattern_re = re.compile("|".join(map(re.escape, self.patterns)))
+        self._term_to_topics: Dict[str, List[str]] = {}
+        for topic in self.decompositions:
+            for term in topic.split():
+                self._term_to_topics.setdefault(term, []).append(topic)
+    
     def get_expansions(self, query: str) -> List[str]:
         """Get pre-computed query expansions"""
+        return list(self._cached_expansions(query))
+    
+    def _compute_expansions(self, query: str) -> Tuple[str, ...]:
+        """Build query expansions (memoized per instance)"""
         query_lower = query.lower()
         expansions = [query]
         
         # Find matching pattern
-        for pattern, config in self.patterns.items():
-            if pattern in query_lower:
-                subject = query_lower.replace(pattern, "").replace("?", "").strip()
-                for expansion in config["expansions"]:
-                    expansions.append(expansion.format(subject=subject))
-                break
+        match = self._pattern_re.search(query_lower)
+        if match:
+            pattern = match.group(0)
+            subject = query_lower.replace(pattern, "").replace("?", "").strip()
+            expansions.extend(
+                expansion.format(subject=subject)
+                for expansion in self.patterns[pattern]["expansions"]
+            )
         
         # Add topic-specific expansions
-        for topic, terms in self.decompositions.items():
-            if any(term in query_lower for term in topic.split()):
-                expansions.extend(terms[:3])
+        topics = dict.fromkeys(
+            topic
+            for word in _WORD_RE.findall(query_lower)
+            for topic in self._term_to_topics.get(word, ())
+        )
+        for topic in topics:
+            expansions.extend(self.decompositions[topic][:3])
         
-        return list(set(expansions))[:5]  # Limit to 5 unique expansions
+        return tuple(dict.fromkeys(expansions))[:5]  # Limit to 5 unique expansions
     
     def get_hypothetical(self, query: str) -> str:
         """Get pre-computed hypothetical answer"""
@@ -126,42 +191,53 @@ class PrecomputedPatterns:
     
     def search(self, query: str, k: int = 5) -> List[Tuple[str, str, Dict[str, Any]]]:
         """Fast search using pre-computed patterns"""
-        all_results = {}
-        
         # Get pre-computed expansions
         expansions = self.get_expansions(query)
-        
-        # Search with each expansion (limit iterations)
-        for i, expansion in enumerate(expansions[:3]):
-            results = basic_search(expansion, k=3)
-            for doc_id, text, meta in results:
-                if doc_id not in all_results:
-                    all_results[doc_id] = (text, meta, 3 - i)  # Higher weight for earlier expansions
-        
-        # Search with pre-computed hypothetical
         hypothetical = self.get_hypothetical(query)
-        hyp_results = basic_search(hypothetical, k=3)
-        for doc_id, text, meta in hyp_results:
-            if doc_id not in all_results:
-                all_results[doc_id] = (text, meta, 2)
+        
+        # The searches are independent round-trips, so run them together: each of
+        # the first 3 expansions goes through both vector and BM25 search, plus
+        # the hypothetical through vector search
+        with concurrent.futures.ThreadPoolExecutor(max_workers=7) as executor:
+            futures = []
+            for expansion in expansions[:3]:
+                futures.append(executor.submit(basic_search, expansion, HYBRID_CANDIDATES))
+                futures.append(executor.submit(_keyword_search, expansion, HYBRID_CANDIDATES))
+            hyp_vector = self._hyp_vectors.get(hypothetical)
+            if hyp_vector is not None:
+                futures.append(executor.submit(search_by_vector, hyp_vector, HYBRID_CANDIDATES))
             else:
-                current = all_results[doc_id]
-                all_results[doc_id] = (current[0], current[1], current[2] + 1)
+                futures.append(executor.submit(basic_search, hypothetical, HYBRID_CANDIDATES))
+        
+        result_lists = [future.result() for future in futures]
+        
+        # Reciprocal Rank Fusion: score(d) = sum over lists of 1 / (K + rank)
+        rrf_scores = defaultdict(float)
+        docs = {}
+        for results in result_lists:
+            for rank, (doc_id, text, meta) in enumerate(results, 1):
+                rrf_scores[doc_id] += 1.0 / (self.rrf_k + rank)
+                # Keyword hits carry no metadata, so prefer the vector copy
+                if doc_id not in docs or (meta and not docs[doc_id][1]):
+                    docs[doc_id] = (text, meta)
         
-        # Sort by weight
-        sorted_results = sorted(all_results.items(), key=lambda x: x[1][2], reverse=True)
-        return [(doc_id, text, meta) for doc_id, (text, meta, _) in sorted_results[:k]]
+        # Sort by fused score
+        ranked = sorted(rrf_scores, key=rrf_scores.get, reverse=True)
+        return [(doc_id, *docs[doc_id]) for doc_id in ranked[:k]]
 
 
 class IndexedQueryCache:
     """Pre-index common query patterns for O(1) lookup"""
     
     def __init__(self):
-        # Build index of query -> results mapping
-        self.index = {}
-        self._build_index()
+        # Query signature -> results mapping, built in the background
+        self.index: Dict[str, List] = {}
+        # (write generation, TTL bucket) the index was built for
+        self._index_key: Optional[Tuple[int, int]] = None
+        self._rebuild: Optional[concurrent.futures.Future] = None
+        self._lock = threading.Lock()
     
-    def _build_index(self):
+    def _build_index(self, key: Tuple[int, int]):
         """Pre-compute results for common queries"""
         common_queries = [
             "What is hybrid search?",
@@ -176,31 +252,49 @@ class IndexedQueryCache:
             "What should be encrypted?"
         ]
         
-        # In production, this would be done offline
+        index = {}
         for query in common_queries:
-            # Store query signature -> result mapping
-            sig = self._get_signature(query)
-            # Results would be pre-computed and stored
-            self.index[sig] = None  # Placeholder
+            try:
+                results = basic_search(query, k=10)
+            except Exception as e:
+                print(f"Warning: Could not pre-compute '{query}': {e}")
+                continue
+            index[self._get_signature(query)] = [
+                (doc_id, text, meta) for doc_id, text, meta in results
+            ]
+        with self._lock:
+            self.index, self._index_key = index, key
+    
+    def invalidate(self):
+        """Drop pre-computed results so the next lookup rebuilds them"""
+        with self._lock:
+            self._index_key = None
     
     def _get_signature(self, query: str) -> str:
         """Get normalized query signature"""
         # Normalize query for matching
         normalized = query.lower().strip()
         # Remove punctuation
-        for char in "?!.,;:":
-            normalized = normalized.replace(char, "")
-        return normalized
+        return normalized.translate(_PUNCT_TABLE)
     
     def get_cached(self, query: str) -> Optional[List]:
-        """Get pre-computed results if available"""
-        sig = self._get_signature(query)
-        return self.index.get(sig)
+        """Get pre-computed results if available
+        
+        A stale index is never served: lookups miss while it is rebuilt in
+        the background.
+        """
+        key = (write_generation(), int(time.time() // QUERY_INDEX_TTL))
+        with self._lock:
+            if key != self._index_key:
+                if self._rebuild is None or self._rebuild.done():
+                    self._rebuild = _INDEX_POOL.submit(self._build_index, key)
+                return None
+            index = self.index
+        return index.get(self._get_signature(query))
 
 
 def test_precomputed():
     """Test pre-computed search"""
-    import time
     
     print("Testing Pre-computed Search Patterns")
     print("=" * 60)
@@ -3,32 +3,52 @@ Production-ready advanced search with all timeout prevention strategies.
 Combines caching, pre-computation, parallelization, and fallbacks.
 """
 
+import os
+import re
 import json
+import heapq
+import queue
+import functools
+import atexit
 import hashlib
 import time
 import pickle
+import threading
 import concurrent.futures
 from pathlib import Path
-from typing import List, Tuple, Dict, Any, Optional
+from typing import List, Tuple, Dict, Any, Optional, Hashable
 from dataclasses import dataclass
 from threading import Lock
 from collections import OrderedDict
 
-from vec_memory import search as basic_search
+from vec_memory import search as basic_search, search_by_vector, embed_texts
 from keyword_search import get_keyword_index
 from search_enhancements import enhanced_search
 
 # Try to import optional dependencies
 try:
+    import torch
     from sentence_transformers import CrossEncoder
     HAS_CROSS_ENCODER = True
 except ImportError:
     HAS_CROSS_ENCODER = False
 
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+try:
+    import xxhash
+    HAS_XXHASH = True
+except ImportError:
+    HAS_XXHASH = False
+
 try:
     from rag_chain import llm
     HAS_LLM = True
-except:
+except Exception:
     HAS_LLM = False
     llm = None
 
@@ -36,73 +56,277 @@ except:
 CACHE_DIR = Path("search_cache")
 CACHE_DIR.mkdir(exist_ok=True)
 MAX_CACHE_SIZE = 1000  # Maximum cached items
+CACHE_SEGMENTS = 16  # Independently locked LRU segments
 CACHE_TTL = 86400  # 24 hours
 LLM_TIMEOUT = 3.0  # 3 seconds max for LLM calls
 SEARCH_TIMEOUT = 10.0  # 10 seconds max for complete search
+RERANK_TIMEOUT = 2.0  # 2 seconds max for cross-encoder scoring
+RERANK_BATCH_WINDOW = 0.005  # Seconds to wait for concurrent rerank requests
+RERANK_MAX_REQUESTS = 32  # Rerank requests folded into one predict call
+RERANK_BATCH_SIZE = 64  # Query-document pairs per cross-encoder forward pass
+JOURNAL_SNAPSHOT_EVERY = 500  # Journal records between full snapshots
+JOURNAL_SNAPSHOT_INTERVAL = 60.0  # Max seconds between snapshots while writing
+
+_SNAPSHOT = object()  # Journal sentinel: write a snapshot and truncate the log
+# What a corrupt, torn or outdated cache file can raise while being read
+_CACHE_READ_ERRORS = (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, ValueError, TypeError)
+
+# Long-lived worker pools, one per nesting level so a task never waits on a
+# pool that its own caller is occupying
+_BATCH_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="search-batch")
+_METHOD_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=6, thread_name_prefix="search-method")
+_SEARCH_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix="search")
+_LLM_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="hyde-llm")
+for _pool in (_BATCH_POOL, _METHOD_POOL, _SEARCH_POOL, _LLM_POOL):
+    atexit.register(_pool.shutdown, wait=False)
+
+
+def _cache_key(tag: bytes, text: str) -> int:
+    """64-bit cache key for text within a tag's namespace"""
+    data = tag + b"\0" + text.encode()
+    if HAS_XXHASH:
+        return xxhash.xxh3_64_intdigest(data)
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+class _Entry:
+    """Cached value with the time it was stored"""
+    __slots__ = ('value', 'timestamp')
+    
+    def __init__(self, value: Any, timestamp: float):
+        self.value = value
+        self.timestamp = timestamp
+    
+    def __getstate__(self):
+        return self.value, self.timestamp
+    
+    def __setstate__(self, state):
+        self.value, self.timestamp = state
+
+
+def _finished(futures, timeout: float):
+    """Yield futures as they finish, until all are done or the deadline passes.
+    
+    Whatever hasn't finished when the caller stops iterating is cancelled.
+    """
+    deadline = time.time() + timeout
+    pending = set(futures)
+    try:
+        while pending:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            done, pending = concurrent.futures.wait(
+                pending, timeout=remaining, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            yield from done
+    finally:
+        for future in pending:
+            future.cancel()
 
 
 class LRUCache:
-    """Thread-safe LRU cache with TTL and persistence"""
+    """Thread-safe LRU cache with TTL and persistence.
+    
+    Keys are spread over CACHE_SEGMENTS segments, each with its own lock and
+    LRU order, so parallel lookups on different keys don't contend.
+    Writes only touch memory; a background thread appends each one to
+    lru_cache.log and periodically folds the log into a fresh snapshot.
+    """
     
     def __init__(self, max_size: int = MAX_CACHE_SIZE, ttl: int = CACHE_TTL):
         self.max_size = max_size
         self.ttl = ttl
-        self.cache = OrderedDict()
-        self.lock = Lock()
+        self.segment_size = max(1, max_size // CACHE_SEGMENTS)
+        self.segments = [(Lock(), OrderedDict()) for _ in range(CACHE_SEGMENTS)]
         self.cache_file = CACHE_DIR / "lru_cache.pkl"
+        self.journal_file = CACHE_DIR / "lru_cache.log"
         self._load_cache()
+        
+        self._journal = queue.Queue()
+        self._writer = threading.Thread(target=self._journal_writer, name="lru-journal", daemon=True)
+        self._writer.start()
+        atexit.register(self.flush)
     
     def _load_cache(self):
-        """Load cache from disk"""
+        """Load the snapshot from disk and replay the journal on top of it"""
+        data = {}
         if self.cache_file.exists():
             try:
                 with open(self.cache_file, 'rb') as f:
                     data = pickle.load(f)
-                    # Filter out expired entries
-                    now = time.time()
-                    self.cache = OrderedDict(
-                        (k, v) for k, v in data.items()
-                        if now - v['timestamp'] < self.ttl
-                    )
-            except:
-                self.cache = OrderedDict()
+            except _CACHE_READ_ERRORS:
+                data = {}
+        
+        if self.journal_file.exists():
+            try:
+                with open(self.journal_file, 'rb') as f:
+                    while True:
+                        key, value, timestamp = pickle.load(f)
+                        data.pop(key, None)
+                        data[key] = _Entry(value, timestamp)
+            except _CACHE_READ_ERRORS:
+                pass  # End of log, or a torn final record from a crash
+        
+        # Filter out expired entries
+        now = time.time()
+        for k, v in data.items():
+            if isinstance(v, _Entry) and now - v.timestamp < self.ttl:
+                self._segment(k)[1][k] = v
+        for _, segment in self.segments:
+            while len(segment) > self.segment_size:
+                segment.popitem(last=False)
     
     def _save_cache(self):
         """Save cache to disk"""
+        data = {}
+        for lock, segment in self.segments:
+            with lock:
+                data.update(segment)
+        # Write beside the snapshot and swap it in, so a crash mid-write
+        # leaves the previous snapshot intact
+        tmp = self.cache_file.with_suffix(".pkl.tmp")
         try:
-            with open(self.cache_file, 'wb') as f:
-                pickle.dump(dict(self.cache), f)
-        except:
+            with open(tmp, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.cache_file)
+        except (OSError, pickle.PicklingError, TypeError):
             pass
     
-    def get(self, key: str) -> Optional[Any]:
+    def _journal_writer(self):
+        """Append queued writes to the log, snapshotting every so often"""
+        try:
+            log = open(self.journal_file, 'ab')
+        except OSError:
+            log = None
+        pending = 0
+        last_snapshot = time.time()
+        
+        while True:
+            try:
+                record = self._journal.get(timeout=JOURNAL_SNAPSHOT_INTERVAL)
+            except queue.Empty:
+                record = None
+            
+            try:
+                if record is not None and record is not _SNAPSHOT and log is not None:
+                    log.write(pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL))
+                    log.flush()
+                    pending += 1
+                
+                due = pending and (
+                    pending >= JOURNAL_SNAPSHOT_EVERY
+                    or time.time() - last_snapshot >= JOURNAL_SNAPSHOT_INTERVAL
+                )
+                if record is _SNAPSHOT or due:
+                    # Everything in the log is already in memory, so once the
+                    # snapshot is down the log can be emptied
+                    self._save_cache()
+                    if log is not None:
+                        log.seek(0)
+                        log.truncate()
+                    pending = 0
+                    last_snapshot = time.time()
+            except Exception:
+                pass
+            finally:
+                if record is not None:
+                    self._journal.task_done()
+    
+    def flush(self):
+        """Write a snapshot and wait for the journal to drain"""
+        self._journal.put(_SNAPSHOT)
+        self._journal.join()
+    
+    def _segment(self, key: Hashable) -> Tuple[Lock, OrderedDict]:
+        """Segment (lock, entries) that owns a key"""
+        return self.segments[hash(key) % CACHE_SEGMENTS]
+    
+    def __len__(self) -> int:
+        return sum(len(segment) for _, segment in self.segments)
+    
+    def clear(self):
+        """Drop every entry, in memory and on disk"""
+        for lock, segment in self.segments:
+            with lock:
+                segment.clear()
+        self.flush()
+    
+    def get(self, key: Hashable) -> Optional[Any]:
         """Get cached value if available"""
-        with self.lock:
-            if key in self.cache:
+        lock, segment = self._segment(key)
+        with lock:
+            if key in segment:
                 # Check TTL
-                entry = self.cache[key]
-                if time.time() - entry['timestamp'] < self.ttl:
+                entry = segment[key]
+                if time.time() - entry.timestamp < self.ttl:
                     # Move to end (most recently used)
-                    self.cache.move_to_end(key)
-                    return entry['value']
+                    segment.move_to_end(key)
+                    return entry.value
                 else:
                     # Expired
-                    del self.cache[key]
+                    del segment[key]
         return None
     
-    def set(self, key: str, value: Any):
+    def set(self, key: Hashable, value: Any):
         """Cache a value"""
-        with self.lock:
-            # Remove oldest if at capacity
-            if len(self.cache) >= self.max_size:
-                self.cache.popitem(last=False)
+        timestamp = time.time()
+        lock, segment = self._segment(key)
+        with lock:
+            if key in segment:
+                # Replacing doesn't grow the segment; just refresh its position
+                segment.move_to_end(key)
+            elif len(segment) >= self.segment_size:
+                # Remove oldest if at capacity
+                segment.popitem(last=False)
             
-            self.cache[key] = {
-                'value': value,
-                'timestamp': time.time()
+            # New keys are inserted at the end already
+            segment[key] = _Entry(value, timestamp)
+        self._journal.put((key, value, timestamp))
+
+
+class _KeywordMatcher:
+    """Finds which of a fixed set of keywords occur in a text in one pass.
+    
+    Uses an Aho-Corasick automaton when pyahocorasick is installed, otherwise
+    a single compiled alternation. Keywords keep the priority of their order.
+    """
+    
+    def __init__(self, keywords):
+        self.keywords = list(keywords)
+        if HAS_AHOCORASICK:
+            self._automaton = ahocorasick.Automaton()
+            for rank, keyword in enumerate(self.keywords):
+                self._automaton.add_word(keyword, rank)
+            self._automaton.make_automaton()
+        else:
+            # Zero-width lookahead so overlapping keywords are all found. Longest
+            # first, so each position reports its longest keyword; the others
+            # matching there are exactly the keywords that are its prefixes
+            by_length = sorted(self.keywords, key=len, reverse=True)
+            self._regex = re.compile(
+                "(?=(" + "|".join(map(re.escape, by_length)) + "))"
+            )
+            self._prefix_ranks = {
+                keyword: [rank for rank, other in enumerate(self.keywords) if keyword.startswith(other)]
+                for keyword in self.keywords
             }
-            self.cache.move_to_end(key)
-            self._save_cache()
+    
+    def _ranks(self, text: str):
+        if HAS_AHOCORASICK:
+            return (rank for _, rank in self._automaton.iter(text))
+        return (
+            rank for m in self._regex.finditer(text) for rank in self._prefix_ranks[m.group(1)]
+        )
+    
+    def first(self, text: str) -> Optional[str]:
+        """Highest-priority keyword contained in text"""
+        rank = min(self._ranks(text), default=None)
+        return None if rank is None else self.keywords[rank]
+    
+    def all(self, text: str) -> List[str]:
+        """Every keyword contained in text, in priority order"""
+        return [self.keywords[rank] for rank in sorted(set(self._ranks(text)))]
 
 
 class PreComputedPatterns:
@@ -112,6 +336,24 @@ class PreComputedPatterns:
         self.patterns = self._load_patterns()
         self.hypotheticals = self._load_hypotheticals()
         self.decompositions = self._load_decompositions()
+        
+        # The hypotheticals are fixed, so embed them once instead of per search
+        self.hypothetical_vectors: Dict[str, List[float]] = {}
+        try:
+            texts = list(self.hypotheticals.values())
+            self.hypothetical_vectors = dict(zip(texts, embed_texts(texts)))
+        except Exception as e:
+            print(f"Warning: Could not pre-embed hypotheticals: {e}")
+        
+        # One scan per table instead of a substring check per key. Question
+        # patterns must be whole words ("which" not in "sandwich")
+        self._pattern_re = re.compile(r"\b(" + "|".join(map(re.escape, self.patterns)) + r")\b")
+        self._hypothetical_matcher = _KeywordMatcher(self.hypotheticals)
+        self._decomposition_matcher = _KeywordMatcher(self.decompositions)
+        
+        # The tables never change after loading, so results can be memoized
+        self._cached_expansions = functools.lru_cache(maxsize=1024)(self._compute_expansions)
+        self._cached_hypothetical = functools.lru_cache(maxsize=1024)(self._compute_hypothetical)
     
     def _load_patterns(self) -> Dict:
         """Load query transformation patterns"""
@@ -170,34 +412,34 @@ class PreComputedPatterns:
     
     def expand_query(self, query: str) -> List[str]:
         """Generate query expansions using patterns"""
+        return list(self._cached_expansions(query))
+    
+    def _compute_expansions(self, query: str) -> Tuple[str, ...]:
+        """Build query expansions (memoized per instance)"""
         query_lower = query.lower()
         expansions = [query]
         
         # Find matching patterns
-        for pattern, templates in self.patterns.items():
-            if pattern in query_lower:
-                subject = query_lower.replace(pattern, "").replace("?", "").strip()
-                for template in templates[:3]:  # Limit expansions
-                    expansions.append(template.format(subject=subject))
-                break
+        match = self._pattern_re.search(query_lower)
+        if match:
+            subject = query_lower[match.end():].replace("?", "").strip()
+            for template in self.patterns[match.group(1)][:3]:  # Limit expansions
+                expansions.append(template.format(subject=subject))
         
         # Add decomposed terms
-        for key, terms in self.decompositions.items():
-            if key in query_lower:
-                expansions.extend(terms[:2])
+        for key in self._decomposition_matcher.all(query_lower):
+            expansions.extend(self.decompositions[key][:2])
         
-        return list(set(expansions))[:5]
+        return tuple(set(expansions))[:5]
     
     def get_hypothetical(self, query: str) -> Optional[str]:
         """Get pre-computed hypothetical answer"""
-        query_lower = query.lower()
-        
-        # Check for keyword matches
-        for keyword, hypothetical in self.hypotheticals.items():
-            if keyword in query_lower:
-                return hypothetical
-        
-        return None
+        return self._cached_hypothetical(query)
+    
+    def _compute_hypothetical(self, query: str) -> Optional[str]:
+        """Find the hypothetical for a query (memoized per instance)"""
+        keyword = self._hypothetical_matcher.first(query.lower())
+        return self.hypotheticals[keyword] if keyword else None
 
 
 class FastHyDE:
@@ -212,7 +454,7 @@ class FastHyDE:
         """Generate hypothetical answer with multiple fallback strategies"""
         
         # Check cache
-        cache_key = f"hyde_{hashlib.md5(query.encode()).hexdigest()}"
+        cache_key = _cache_key(b"hyde", query)
         cached = self.cache.get(cache_key)
         if cached:
             return cached
@@ -226,17 +468,16 @@ class FastHyDE:
         # Try LLM with timeout
         if self.llm and HAS_LLM:
             try:
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(
-                        self.llm.invoke,
-                        f"Generate a brief, factual answer to: {query}"
-                    )
-                    result = future.result(timeout=LLM_TIMEOUT)
-                    answer = result.content if hasattr(result, 'content') else str(result)
-                    self.cache.set(cache_key, answer)
-                    return answer
-            except:
-                pass
+                future = _LLM_POOL.submit(
+                    self.llm.invoke,
+                    f"Generate a brief, factual answer to: {query}"
+                )
+                result = future.result(timeout=LLM_TIMEOUT)
+                answer = result.content if hasattr(result, 'content') else str(result)
+                self.cache.set(cache_key, answer)
+                return answer
+            except Exception:
+                pass  # Timed out or failed; use the template fallback
         
         # Fallback: template-based generation
         query_lower = query.lower()
@@ -257,37 +498,50 @@ class FastHyDE:
         hypothetical = self.generate_hypothetical(query)
         
         # Search with both hypothetical and original
-        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
-            futures = [
-                executor.submit(basic_search, hypothetical, k),
-                executor.submit(basic_search, query, k//2)
-            ]
-            
-            all_results = []
-            try:
-                for future in concurrent.futures.as_completed(futures, timeout=SEARCH_TIMEOUT):
-                    try:
-                        all_results.extend(future.result())
-                    except:
-                        pass
-            except concurrent.futures.TimeoutError:
-                pass  # Use partial results
-        
-        # Deduplicate
+        hyp_vector = self.patterns.hypothetical_vectors.get(hypothetical)
+        if hyp_vector is not None:
+            hyp_future = _SEARCH_POOL.submit(search_by_vector, hyp_vector, k)
+        else:
+            hyp_future = _SEARCH_POOL.submit(basic_search, hypothetical, k)
+        futures = [
+            hyp_future,
+            _SEARCH_POOL.submit(basic_search, query, k//2)
+        ]
+        
+        # Deduplicate as results arrive
         seen = set()
         unique = []
-        for doc_id, text, meta in all_results:
-            if doc_id not in seen:
-                seen.add(doc_id)
-                unique.append((doc_id, text, meta))
-                if len(unique) >= k:
-                    break
-        
-        return unique
+        for future in _finished(futures, SEARCH_TIMEOUT):
+            try:
+                results = future.result()
+            except Exception:
+                continue
+            for doc_id, text, meta in results:
+                if doc_id not in seen:
+                    seen.add(doc_id)
+                    unique.append((doc_id, text, meta))
+            if len(unique) >= k:
+                break  # Enough already; the other search is cancelled
+        
+        return unique[:k]
+
+
+@dataclass
+class _RerankRequest:
+    """Query-document pairs waiting to be scored by the batching thread"""
+    query: str
+    pairs: List[Tuple[str, str]]
+    future: concurrent.futures.Future
 
 
 class FastCrossEncoder:
-    """Fast cross-encoder reranking with caching"""
+    """Fast cross-encoder reranking with caching.
+    
+    Concurrent rerank calls are scored together: a background thread collects
+    the requests that arrive within RERANK_BATCH_WINDOW and scores them in one
+    pass. Each query is tokenized once and paired with every document's
+    tokens, rather than re-tokenizing the same query for every pair.
+    """
     
     def __init__(self, cache: LRUCache):
         self.cache = cache
@@ -295,8 +549,95 @@ class FastCrossEncoder:
         if HAS_CROSS_ENCODER:
             try:
                 self.model = CrossEncoder('cross-encoder/ms-marco-MiniLM-L-6-v2')
-            except:
+            except Exception:
                 pass
+        
+        self._requests = queue.Queue()
+        self._model_lock = Lock()
+        self._pretokenize = True
+        self._query_ids = functools.lru_cache(maxsize=256)(self._tokenize_query)
+        if self.model:
+            threading.Thread(target=self._batch_worker, name="rerank-batch", daemon=True).start()
+    
+    def _batch_worker(self):
+        """Score queued rerank requests in micro-batches"""
+        while True:
+            batch = [self._requests.get()]
+            deadline = time.time() + RERANK_BATCH_WINDOW
+            while len(batch) < RERANK_MAX_REQUESTS:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            # Callers that already timed out have cancelled their futures
+            batch = [r for r in batch if r.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            
+            try:
+                with self._model_lock:
+                    scores = self._predict(batch)
+            except Exception as e:
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            
+            start = 0
+            for request in batch:
+                end = start + len(request.pairs)
+                request.future.set_result(scores[start:end])
+                start = end
+    
+    def _tokenize_query(self, query: str) -> Tuple[int, ...]:
+        """Token ids for a query, without special tokens (memoized)"""
+        return tuple(self.model.tokenizer.encode(query, add_special_tokens=False))
+    
+    def _predict(self, batch: List[_RerankRequest]) -> List[float]:
+        """Score every pair in a batch of rerank requests"""
+        if self._pretokenize:
+            try:
+                return self._predict_pretokenized(batch)
+            except Exception as e:
+                # Tokenizer/model API not what we expect; use the stock path
+                print(f"Warning: pre-tokenized reranking unavailable, using predict(): {e}")
+                self._pretokenize = False
+        
+        return self.model.predict(
+            [pair for request in batch for pair in request.pairs],
+            batch_size=RERANK_BATCH_SIZE
+        )
+    
+    def _predict_pretokenized(self, batch: List[_RerankRequest]) -> List[float]:
+        """Raw relevance logits, tokenizing each query once.
+        
+        Only the ordering is used, so the logits are returned without
+        predict()'s sigmoid.
+        """
+        tokenizer = self.model.tokenizer
+        encoded = []
+        for request in batch:
+            query_ids = list(self._query_ids(request.query))
+            for _, doc in request.pairs:
+                # Same special tokens and longest_first truncation as a joint call
+                encoded.append(tokenizer.prepare_for_model(
+                    query_ids,
+                    tokenizer.encode(doc, add_special_tokens=False),
+                    truncation='longest_first',
+                    max_length=self.model.max_length
+                ))
+        
+        scores = []
+        with torch.no_grad():
+            for start in range(0, len(encoded), RERANK_BATCH_SIZE):
+                features = tokenizer.pad(encoded[start:start + RERANK_BATCH_SIZE], return_tensors='pt')
+                features = features.to(self.model.model.device)
+                logits = self.model.model(**features, return_dict=True).logits
+                scores.extend(logits[:, 0].tolist())
+        return scores
     
     def rerank(self, query: str, documents: List[Tuple], k: int = 5) -> List[Tuple]:
         """Rerank documents with caching"""
@@ -304,7 +645,7 @@ class FastCrossEncoder:
             return documents[:k]
         
         # Check cache for this query-document combination
-        cache_key = f"rerank_{hashlib.md5((query + str(len(documents))).encode()).hexdigest()}"
+        cache_key = _cache_key(b"rerank", query + str(len(documents)))
         cached = self.cache.get(cache_key)
         if cached:
             # Apply cached ordering
@@ -315,10 +656,22 @@ class FastCrossEncoder:
             # Prepare pairs
             pairs = [(query, doc[1]) for doc in documents]
             
-            # Score with timeout
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(self.model.predict, pairs)
-                scores = future.result(timeout=2.0)
+            request = _RerankRequest(query, pairs, concurrent.futures.Future())
+            if self._requests.empty() and self._model_lock.acquire(blocking=False):
+                # Nothing to batch with: score right here rather than handing
+                # off to the worker and waiting out the batch window
+                try:
+                    scores = self._predict([request])
+                finally:
+                    self._model_lock.release()
+            else:
+                # Score with timeout
+                self._requests.put(request)
+                try:
+                    scores = request.future.result(timeout=RERANK_TIMEOUT)
+                except concurrent.futures.TimeoutError:
+                    request.future.cancel()
+                    raise
             
             # Combine and sort
             scored = [(documents[i], float(scores[i])) for i in range(len(documents))]
@@ -329,7 +682,7 @@ class FastCrossEncoder:
             self.cache.set(cache_key, result_ids)
             
             return [doc[0] for doc in scored[:k]]
-        except:
+        except Exception:
             # Fallback to original order
             return documents[:k]
 
@@ -342,44 +695,48 @@ class ParallelMultiStage:
     
     def retrieve(self, query: str, k: int = 5) -> List[Tuple[str, str, Dict[str, Any]]]:
         """Multi-stage retrieval with parallelization"""
-        all_results = {}
+        # Hits are stored column-wise; id_to_idx gives each doc its row
+        id_to_idx: Dict[str, int] = {}
+        texts: List[str] = []
+        metas: List[Dict[str, Any]] = []
+        scores: List[float] = []
         
         # Get query expansions
         expansions = self.patterns.expand_query(query)
         
         # Stage 1: Parallel search with multiple strategies
-        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-            futures = []
-            
-            # Original query
-            futures.append(executor.submit(enhanced_search, query, k))
-            
-            # Expansions
-            for expansion in expansions[:2]:
-                futures.append(executor.submit(basic_search, expansion, 3))
-            
-            # Keyword search
-            futures.append(executor.submit(self._keyword_search, query, k))
-            
-            # Collect results with timeout protection
+        futures = []
+        
+        # Original query
+        futures.append(_SEARCH_POOL.submit(enhanced_search, query, k))
+        
+        # Expansions
+        for expansion in expansions[:2]:
+            futures.append(_SEARCH_POOL.submit(basic_search, expansion, 3))
+        
+        # Keyword search
+        futures.append(_SEARCH_POOL.submit(self._keyword_search, query, k))
+        
+        # Collect results until all are in or the deadline passes
+        for future in _finished(futures, SEARCH_TIMEOUT):
             try:
-                for future in concurrent.futures.as_completed(futures, timeout=SEARCH_TIMEOUT):
-                    try:
-                        results = future.result(timeout=1)
-                        for doc_id, text, meta in results:
-                            if doc_id not in all_results:
-                                all_results[doc_id] = (text, meta, 1.0)
-                            else:
-                                current = all_results[doc_id]
-                                all_results[doc_id] = (current[0], current[1], current[2] + 0.5)
-                    except:
-                        pass
-            except concurrent.futures.TimeoutError:
-                pass  # Some searches didn't finish, use what we have
-        
-        # Sort by score
-        sorted_results = sorted(all_results.items(), key=lambda x: x[1][2], reverse=True)
-        return [(doc_id, text, meta) for doc_id, (text, meta, _) in sorted_results[:k]]
+                results = future.result()
+                for doc_id, text, meta in results:
+                    idx = id_to_idx.get(doc_id)
+                    if idx is None:
+                        id_to_idx[doc_id] = len(texts)
+                        texts.append(text)
+                        metas.append(meta)
+                        scores.append(1.0)
+                    else:
+                        scores[idx] += 0.5
+            except Exception:
+                pass
+        
+        # Keep the k best scores
+        doc_ids = list(id_to_idx)
+        top_rows = heapq.nlargest(k, range(len(scores)), key=scores.__getitem__)
+        return [(doc_ids[i], texts[i], metas[i]) for i in top_rows]
     
     def _keyword_search(self, query: str, k: int) -> List[Tuple]:
         """Helper for keyword search"""
@@ -388,11 +745,15 @@ class ParallelMultiStage:
             if ki.enabled:
                 results = ki.search(query, k=k)
                 return [(doc_id, content, {}) for doc_id, _, content in results]
-        except:
+        except Exception:
             pass
         return []
 
 
+class _NoResults(Exception):
+    """Raised inside the memoized search so empty results aren't cached"""
+
+
 class ProductionAdvancedSearch:
     """Production-ready advanced search with all optimizations"""
     
@@ -406,6 +767,10 @@ class ProductionAdvancedSearch:
         self.cross_encoder = FastCrossEncoder(self.cache)
         self.multi_stage = ParallelMultiStage(self.patterns)
         
+        # In-process front of the persistent cache: a repeat query is a single
+        # dict lookup with no segment lock or TTL bookkeeping
+        self._memo_search = functools.lru_cache(maxsize=MAX_CACHE_SIZE)(self._search_memoizable)
+        
         print("Production search initialized with caching, pre-computation, and parallelization")
     
     def search(self, query: str, k: int = 5, use_cross_encoder: bool = True) -> List[Tuple[str, str, Dict[str, Any]]]:
@@ -420,55 +785,72 @@ class ProductionAdvancedSearch:
         Returns:
             List of (doc_id, text, metadata) tuples
         """
-        
+        # Entries age out when the CACHE_TTL-sized time bucket rolls over
+        try:
+            return list(self._memo_search(query, k, use_cross_encoder, int(time.time() // CACHE_TTL)))
+        except _NoResults:
+            return []
+    
+    def _search_memoizable(self, query: str, k: int, use_cross_encoder: bool, ttl_bucket: int) -> Tuple:
+        """_search_impl as a tuple; empty results raise so they aren't memoized"""
+        results = self._search_impl(query, k, use_cross_encoder)
+        if not results:
+            raise _NoResults()
+        return tuple(results)
+    
+    def _search_impl(self, query: str, k: int, use_cross_encoder: bool) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """Uncached search: persistent cache, parallel methods, fusion, reranking"""
         # Check full result cache
-        cache_key = f"search_{hashlib.md5((query + str(k)).encode()).hexdigest()}"
+        cache_key = _cache_key(b"search", query + str(k))
         cached = self.cache.get(cache_key)
         if cached:
             return cached
         
-        all_results = {}
-        weights = {}
+        # Candidates are stored column-wise; id_to_idx gives each doc its row
+        id_to_idx: Dict[str, int] = {}
+        texts: List[str] = []
+        metas: List[Dict[str, Any]] = []
+        weights: List[float] = []
         
         # Run all methods in parallel with timeout
-        with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-            futures = {
-                executor.submit(self.hyde.search, query, k*2): ("hyde", 1.2),
-                executor.submit(self.multi_stage.retrieve, query, k*2): ("multi", 1.1),
-                executor.submit(enhanced_search, query, k*2): ("enhanced", 1.0)
-            }
-            
-            # Collect results with timeout protection
+        futures = {
+            _METHOD_POOL.submit(self.hyde.search, query, k*2): ("hyde", 1.2),
+            _METHOD_POOL.submit(self.multi_stage.retrieve, query, k*2): ("multi", 1.1),
+            _METHOD_POOL.submit(enhanced_search, query, k*2): ("enhanced", 1.0)
+        }
+        
+        rerank = use_cross_encoder and HAS_CROSS_ENCODER
+        needed = k*2 if rerank else k
+        
+        # Collect results until all are in or the deadline passes
+        for future in _finished(futures, SEARCH_TIMEOUT):
             try:
-                for future in concurrent.futures.as_completed(futures, timeout=SEARCH_TIMEOUT):
-                    try:
-                        results = future.result(timeout=2)
-                        method, weight = futures[future]
-                        
-                        for i, (doc_id, text, meta) in enumerate(results):
-                            if doc_id not in all_results:
-                                all_results[doc_id] = (text, meta)
-                                weights[doc_id] = 0
-                            # Score based on rank and method weight
-                            weights[doc_id] += (len(results) - i) / len(results) * weight
-                    except:
-                        pass  # Method timed out, continue
-            except concurrent.futures.TimeoutError:
-                pass  # Some methods didn't finish, use what we have
-        
-        # Convert to list
-        candidates = [(doc_id, text, meta) for doc_id, (text, meta) in all_results.items()]
-        
-        # Sort by initial weights
-        candidates_weighted = [(d[0], d[1], d[2], weights.get(d[0], 0)) for d in candidates]
-        candidates_weighted.sort(key=lambda x: x[3], reverse=True)
+                results = future.result()
+                method, weight = futures[future]
+                
+                n = len(results)
+                for i, (doc_id, text, meta) in enumerate(results):
+                    idx = id_to_idx.get(doc_id)
+                    if idx is None:
+                        idx = id_to_idx[doc_id] = len(texts)
+                        texts.append(text)
+                        metas.append(meta)
+                        weights.append(0.0)
+                    # Score based on rank and method weight
+                    weights[idx] += (n - i) / n * weight
+            except Exception:
+                pass  # Method failed, continue
+        
+        # Rank rows by initial weight, keeping only as many as are used below
+        doc_ids = list(id_to_idx)
+        top_rows = heapq.nlargest(needed, range(len(weights)), key=weights.__getitem__)
+        top_candidates = [(doc_ids[i], texts[i], metas[i]) for i in top_rows]
         
         # Apply cross-encoder reranking if enabled
-        if use_cross_encoder and HAS_CROSS_ENCODER:
-            top_candidates = [(d[0], d[1], d[2]) for d in candidates_weighted[:k*2]]
+        if rerank:
             final_results = self.cross_encoder.rerank(query, top_candidates, k)
         else:
-            final_results = [(d[0], d[1], d[2]) for d in candidates_weighted[:k]]
+            final_results = top_candidates
         
         # Cache the results
         self.cache.set(cache_key, final_results)
@@ -488,25 +870,24 @@ class ProductionAdvancedSearch:
         """
         results = {}
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-            futures = {
-                executor.submit(self.search, query, k): query
-                for query in queries
-            }
-            
-            for future in concurrent.futures.as_completed(futures, timeout=SEARCH_TIMEOUT * len(queries)):
-                query = futures[future]
-                try:
-                    results[query] = future.result()
-                except:
-                    results[query] = []  # Failed query
+        futures = {
+            _BATCH_POOL.submit(self.search, query, k): query
+            for query in queries
+        }
+        
+        for future in concurrent.futures.as_completed(futures, timeout=SEARCH_TIMEOUT * len(queries)):
+            query = futures[future]
+            try:
+                results[query] = future.result()
+            except Exception:
+                results[query] = []  # Failed query
         
         return results
     
     def clear_cache(self):
         """Clear the cache"""
-        self.cache.cache.clear()
-        self.cache._save_cache()
+        self._memo_search.cache_clear()
+        self.cache.clear()
         print("Cache cleared")
 
 
@@ -18,7 +18,7 @@ hybrid = HybridRAG()
 
 def answer(query: str, k: int = 5):
     """Enhanced answer function with hybrid RAG."""
-    response, doc_ids, source = hybrid.answer(query, k)
+    response, doc_ids, source, context = hybrid.answer_with_context(query, k)
     
     # Add source indication for transparency
     if source == "llm_knowledge":
@@ -27,9 +27,7 @@ def answer(query: str, k: int = 5):
     # Extract and store new facts (if any) from the response
     if doc_ids:
         # Only process facts when we have context from database
-        from search_enhancements import enhanced_search as search
-        hits = search(query, k)
-        blob = " ".join(doc for _, doc, *_ in hits).lower()
+        blob = context.lower()
         
         for line in response.splitlines():
             if line.strip().upper().startswith("FACT:"):
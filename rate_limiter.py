@@ -1,11 +1,33 @@
 """
 Rate limiting and request validation for API security.
 """
-from datetime import datetime, timedelta
-from collections import defaultdict, deque
+import time
+from collections import OrderedDict
 import threading
 from functools import wraps
-from typing import Optional, Callable, Any
+from typing import Optional, Callable, Dict, List, Tuple
+
+# Each bucket is one int: fixed-point tokens in the high 32 bits and the
+# monotonic tick of the last refill in the low 32 bits
+TOKEN_SCALE = 1_000_000  # Token units per whole token
+TICK_SHIFT = 20  # One tick is 2**20 ns (~1 ms)
+TICK_MASK = 0xFFFFFFFF  # Ticks wrap after ~52 days; differences are taken mod 2**32
+NS_PER_MINUTE = 60_000_000_000
+LOCK_STRIPES = 64  # Keys hash onto this many locks
+MAX_BUCKETS = 100_000  # Least recently used keys are evicted past this
+SWEEP_LIMIT = 20  # Most idle buckets dropped per new key
+
+
+def _now_ticks() -> int:
+    """Current monotonic time in ticks, truncated to 32 bits."""
+    return (time.monotonic_ns() >> TICK_SHIFT) & TICK_MASK
+
+
+def _refill(tokens: int, elapsed_ticks: int, rate: int, full_tokens: int) -> int:
+    """Fixed-point tokens after refilling for elapsed_ticks at rate per minute."""
+    added = ((elapsed_ticks * rate * TOKEN_SCALE) << TICK_SHIFT) // NS_PER_MINUTE
+    return min(full_tokens, tokens + added)
+
 
 class RateLimiter:
     """Token bucket rate limiter for API protection."""
@@ -17,59 +39,112 @@ class RateLimiter:
     ):
         self.rate = rate
         self.burst = burst
-        self.buckets = defaultdict(lambda: {
-            'tokens': burst,
-            'last_refill': datetime.now()
-        })
-        self.lock = threading.Lock()
+        self.full_tokens = burst * TOKEN_SCALE
+        # Unrelated keys don't contend: each stripe owns its own lock and an
+        # LRU of buckets capped at its share of MAX_BUCKETS
+        self.locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self.stripes: List["OrderedDict[str, int]"] = [OrderedDict() for _ in range(LOCK_STRIPES)]
+        self.stripe_max = max(1, MAX_BUCKETS // LOCK_STRIPES)
+        # A bucket idle this many ticks has refilled completely, which is
+        # the same as not having one
+        self.idle_ticks = ((burst * NS_PER_MINUTE // rate) >> TICK_SHIFT) + 1
+    
+    @property
+    def buckets(self) -> Dict[str, int]:
+        """Snapshot of every key's packed bucket state."""
+        merged: Dict[str, int] = {}
+        for stripe in self.stripes:
+            merged.update(stripe)
+        return merged
+    
+    def _stripe(self, key: str) -> threading.Lock:
+        """Lock guarding a key's bucket."""
+        return self.locks[hash(key) % LOCK_STRIPES]
     
-    def _refill_tokens(self, bucket):
-        """Refill tokens based on time elapsed."""
-        now = datetime.now()
-        time_passed = (now - bucket['last_refill']).total_seconds()
+    def _store(self, key: str, state: int):
+        """Save a bucket as most recently used, evicting the oldest if full."""
+        stripe = self.stripes[hash(key) % LOCK_STRIPES]
+        if key in stripe:
+            stripe.move_to_end(key)
+        else:
+            self._sweep(stripe, state & TICK_MASK)
+            if len(stripe) >= self.stripe_max:
+                stripe.popitem(last=False)
+        stripe[key] = state
+    
+    def _sweep(self, stripe: "OrderedDict[str, int]", now: int):
+        """Drop up to SWEEP_LIMIT fully refilled buckets from the idle end."""
+        for _ in range(SWEEP_LIMIT):
+            if not stripe:
+                return
+            key, state = next(iter(stripe.items()))
+            if (now - state) & TICK_MASK < self.idle_ticks:
+                return
+            del stripe[key]
+    
+    def _full_bucket(self) -> int:
+        """Packed state of a bucket that was just filled."""
+        return (self.full_tokens << 32) | _now_ticks()
+    
+    def _refill_tokens(self, key: str) -> Tuple[int, int]:
+        """Refill tokens based on time elapsed; returns (tokens, now_ticks)."""
+        state = self.stripes[hash(key) % LOCK_STRIPES].get(key)
+        if state is None:
+            state = self._full_bucket()
+        tokens, last = state >> 32, state & TICK_MASK
+        now = _now_ticks()
+        elapsed = (now - last) & TICK_MASK
         
         # Add tokens based on rate
-        tokens_to_add = time_passed * (self.rate / 60.0)
-        bucket['tokens'] = min(self.burst, bucket['tokens'] + tokens_to_add)
-        bucket['last_refill'] = now
+        return _refill(tokens, elapsed, self.rate, self.full_tokens), now
     
     def allow_request(self, key: str) -> bool:
         """Check if request is allowed."""
-        with self.lock:
-            bucket = self.buckets[key]
-            self._refill_tokens(bucket)
+        with self._stripe(key):
+            tokens, now = self._refill_tokens(key)
             
-            if bucket['tokens'] >= 1:
-                bucket['tokens'] -= 1
+            if tokens >= TOKEN_SCALE:
+                self._store(key, ((tokens - TOKEN_SCALE) << 32) | now)
                 return True
             
+            self._store(key, (tokens << 32) | now)
             return False
     
     def get_wait_time(self, key: str) -> float:
         """Get seconds to wait before next request is allowed."""
-        with self.lock:
-            bucket = self.buckets[key]
-            self._refill_tokens(bucket)
+        with self._stripe(key):
+            tokens, now = self._refill_tokens(key)
+            self._store(key, (tokens << 32) | now)
             
-            if bucket['tokens'] >= 1:
+            if tokens >= TOKEN_SCALE:
                 return 0.0
             
-            # Calculate time needed for one token
-            seconds_per_token = 60.0 / self.rate
-            return seconds_per_token
+            # Time until the deficit to one whole token has refilled
+            deficit = TOKEN_SCALE - tokens
+            wait_ns = -(-deficit * NS_PER_MINUTE // (self.rate * TOKEN_SCALE))
+            return wait_ns / 1e9
     
     def decorator(self, get_key_func: Optional[Callable] = None):
         """Decorator for rate limiting functions."""
         def decorator_wrapper(func):
+            if get_key_func:
+                @wraps(func)
+                def wrapper(*args, **kwargs):
+                    # Determine the key for rate limiting
+                    key = get_key_func(*args, **kwargs)
+                    
+                    if not self.allow_request(key):
+                        wait_time = self.get_wait_time(key)
+                        raise Exception(f"Rate limit exceeded. Please wait {wait_time:.1f} seconds.")
+                    
+                    return func(*args, **kwargs)
+                return wrapper
+            
+            # Default to using the function name, looked up once
+            key = func.__name__
+            
             @wraps(func)
             def wrapper(*args, **kwargs):
-                # Determine the key for rate limiting
-                if get_key_func:
-                    key = get_key_func(*args, **kwargs)
-                else:
-                    # Default to using the function name
-                    key = func.__name__
-                
                 if not self.allow_request(key):
                     wait_time = self.get_wait_time(key)
                     raise Exception(f"Rate limit exceeded. Please wait {wait_time:.1f} seconds.")
@@ -80,15 +155,21 @@ class RateLimiter:
     
     def reset(self, key: Optional[str] = None):
         """Reset rate limit for a specific key or all keys."""
-        with self.lock:
-            if key:
-                if key in self.buckets:
-                    self.buckets[key] = {
-                        'tokens': self.burst,
-                        'last_refill': datetime.now()
-                    }
-            else:
-                self.buckets.clear()
+        if key:
+            with self._stripe(key):
+                stripe = self.stripes[hash(key) % LOCK_STRIPES]
+                if key in stripe:
+                    stripe[key] = self._full_bucket()
+        else:
+            # Take every stripe, always in the same order
+            for lock in self.locks:
+                lock.acquire()
+            try:
+                for stripe in self.stripes:
+                    stripe.clear()
+            finally:
+                for lock in reversed(self.locks):
+                    lock.release()
 
 # Global rate limiters for different operations
 search_limiter = RateLimiter(rate=120, burst=30)  # 120 searches per minute
@@ -1,75 +1,152 @@
 """Script to re-ingest documents with improved chunking for better recall."""
 import os
+import re
 from pathlib import Path
 from pypdf import PdfReader
 from io import BytesIO
-from vec_memory import upsert_note, reset_all, get_memory_stats
-from improved_chunking import smart_chunks
+from concurrent.futures import ProcessPoolExecutor
+from pdf_text import extract_page_range
 import time
 import json
 
+# PyMuPDF (MuPDF, C) extracts text much faster than pypdf when it's installed
+try:
+    import fitz
+    HAS_PYMUPDF = True
+except ImportError:
+    HAS_PYMUPDF = False
+
+# vec_memory (which connects to OpenAI and Pinecone on import) and the chunker
+# are imported inside the functions that use them: spawned page-extraction
+# workers re-import this module and need neither
+
+# Searchability flags; each group name is the metadata key it sets
+_META_FLAGS_RE = re.compile(
+    r"(?P<contains_dollar>\$)"
+    r"|(?P<domain>education|healthcare|enterprise)"
+    r"|(?P<security_related>security|privacy|access control)",
+    re.IGNORECASE
+)
+UPSERT_BATCH_SIZE = 100  # Chunks per embedding request and vector upsert
+PARALLEL_PAGE_THRESHOLD = 16  # Below this many pages, extract serially
+
+
+def _extract_pages(pdf_bytes: bytes):
+    """Yield the text of every page in order, split across processes for large PDFs."""
+    if HAS_PYMUPDF:
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            for page in doc:
+                yield page.get_text()
+        return
+    
+    reader = PdfReader(BytesIO(pdf_bytes))
+    n_pages = len(reader.pages)
+    if n_pages < PARALLEL_PAGE_THRESHOLD:
+        for page in reader.pages:
+            yield page.extract_text()
+        return
+    
+    # pypdf parsing is pure Python, so use processes; each worker opens the
+    # PDF once and takes a contiguous run of pages
+    workers = min(os.cpu_count() or 1, n_pages)
+    step = -(-n_pages // workers)
+    ranges = [(pdf_bytes, start, min(start + step, n_pages)) for start in range(0, n_pages, step)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for texts in executor.map(extract_page_range, ranges):
+            yield from texts
+
+
+def _page_texts(pdf_bytes: bytes):
+    """Yield page texts with page markers, joined by newlines when concatenated."""
+    separator = ""
+    for page_num, text in enumerate(_extract_pages(pdf_bytes), 1):
+        if text:
+            yield f"{separator}\n--- Page {page_num} ---\n{text}"
+            separator = "\n"
+
+
+def _upsert_batches(chunks, metadatas, progress: bool = False) -> int:
+    """Upsert chunks in batches; returns how many were stored.
+    
+    upsert_many retries each batch's upsert, so only a batch that keeps
+    failing is skipped.
+    """
+    from vec_memory import upsert_many
+    
+    pending = [(c.strip(), m) for c, m in zip(chunks, metadatas) if c and c.strip()]
+    total = 0
+    
+    # Batches run on this thread: the keyword index's SQLite connection
+    # can only be used from the thread that opened it
+    for start in range(0, len(pending), UPSERT_BATCH_SIZE):
+        batch = pending[start:start + UPSERT_BATCH_SIZE]
+        try:
+            total += len(upsert_many(
+                [c for c, _ in batch], {},
+                batch_size=UPSERT_BATCH_SIZE, chunk_meta=[m for _, m in batch]
+            ))
+            
+            # Progress indicator
+            if progress:
+                print(f"  Processed {total}/{len(pending)} chunks...")
+        except Exception as e:
+            print(f"  Error ingesting chunks {start}-{start + len(batch) - 1}: {e}")
+    
+    return total
+
+
 def reingest_pdf(file_path: str, chunk_size: int = 1200, overlap: int = 200):
     """Re-ingest a PDF file with smart chunking."""
+    from improved_chunking import smart_chunks_stream
+    
     print(f"\nProcessing: {file_path}")
     
     # Read the PDF
     with open(file_path, 'rb') as f:
         pdf_bytes = f.read()
     
-    reader = PdfReader(BytesIO(pdf_bytes))
+    # Chunk pages as they're extracted and ingest each batch as it fills, so
+    # the whole document's text is never held at once
+    chunks, metadatas = [], []
+    n_chunks = 0
     total_chunks = 0
-    
-    # Extract text from all pages
-    all_text = []
-    for page_num, page in enumerate(reader.pages, 1):
-        text = page.extract_text()
-        if text:
-            all_text.append(f"\n--- Page {page_num} ---\n{text}")
-    
-    # Combine all text
-    full_text = "\n".join(all_text)
-    
-    # Use smart chunking with overlap
-    chunks = smart_chunks(full_text, chunk_size=chunk_size, overlap=overlap)
-    
-    print(f"Created {len(chunks)} chunks with {overlap} char overlap")
-    
-    # Ingest each chunk
-    for i, chunk in enumerate(chunks):
+    stream = smart_chunks_stream(_page_texts(pdf_bytes), chunk_size=chunk_size, overlap=overlap)
+    for i, chunk in enumerate(stream):
         metadata = {
             "source": Path(file_path).name,
             "type": "pdf",
             "chunk_index": i,
-            "total_chunks": len(chunks),
             "chunking_method": "smart_overlap",
             "chunk_size": chunk_size,
             "overlap": overlap
         }
         
-        # Extract key information for better searchability
-        if "$" in chunk:
-            metadata["contains_dollar"] = True
-        if any(word in chunk.lower() for word in ["education", "healthcare", "enterprise"]):
-            metadata["domain"] = True
-        if any(word in chunk.lower() for word in ["security", "privacy", "access control"]):
-            metadata["security_related"] = True
-            
-        try:
-            upsert_note(chunk, metadata)
-            total_chunks += 1
+        # Extract key information for better searchability (one scan)
+        for match in _META_FLAGS_RE.finditer(chunk):
+            metadata[match.lastgroup] = True
+        chunks.append(chunk)
+        metadatas.append(metadata)
+        n_chunks += 1
+        
+        if len(chunks) == UPSERT_BATCH_SIZE:
+            total_chunks += _upsert_batches(chunks, metadatas)
+            chunks.clear()
+            metadatas.clear()
             
             # Progress indicator
-            if (i + 1) % 10 == 0:
-                print(f"  Processed {i + 1}/{len(chunks)} chunks...")
-        except Exception as e:
-            print(f"  Error ingesting chunk {i}: {e}")
+            print(f"  Processed {total_chunks}/{n_chunks} chunks...")
     
+    total_chunks += _upsert_batches(chunks, metadatas)
+    
+    print(f"Created {n_chunks} chunks with {overlap} char overlap")
     print(f"Successfully ingested {total_chunks} chunks from {file_path}")
     return total_chunks
 
 
 def reingest_demo_content():
     """Re-ingest demo content with improved chunking."""
+    from improved_chunking import smart_chunks
+    
     print("Re-ingesting Demo Document content with improved chunking...")
     
     # Define demo content based on what we know is in the Demo Document
@@ -112,21 +189,19 @@ def reingest_demo_content():
     
     print(f"Created {len(chunks)} chunks from demo content")
     
-    total_ingested = 0
-    for i, chunk in enumerate(chunks):
-        metadata = {
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    metadatas = [
+        {
             "source": "demo_content_reingest",
             "type": "text",
             "chunk_index": i,
             "total_chunks": len(chunks),
-            "reingest_timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+            "reingest_timestamp": timestamp
         }
-        
-        try:
-            upsert_note(chunk, metadata)
-            total_ingested += 1
-        except Exception as e:
-            print(f"Error ingesting chunk {i}: {e}")
+        for i in range(len(chunks))
+    ]
+    
+    total_ingested = _upsert_batches(chunks, metadatas)
     
     print(f"Successfully ingested {total_ingested} demo content chunks")
     return total_ingested
@@ -134,6 +209,8 @@ def reingest_demo_content():
 
 def main():
     """Main re-ingestion process."""
+    from vec_memory import reset_all, get_memory_stats
+    
     print("="*60)
     print("DOCUMENT RE-INGESTION TOOL")
     print("="*60)
@@ -4,7 +4,8 @@ Run with: python run_tests.py
 """
 import subprocess
 import sys
-import time
+
+COMMAND_TIMEOUT = 600  # Seconds before a suite is killed and counted as failed
 
 def run_command(cmd, description):
     """Run a command and report results"""
@@ -13,7 +14,7 @@ def run_command(cmd, description):
     print(f"{'='*60}")
     
     try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+        result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=COMMAND_TIMEOUT)
         if result.returncode == 0:
             print(f"✅ SUCCESS")
             if result.stdout:
@@ -36,16 +37,17 @@ def main():
     print("=" * 60)
     
     tests = [
-        ("python -m pytest tests/test_basic.py -v", "Running Unit Tests"),
+        ("python -m pytest tests -v", "Running Unit Tests"),
         ("python diagnose_recall.py", "Running Recall Diagnostic"),
         ("python eval.py", "Running Full Evaluation")
     ]
     
+    # One at a time: the suites share the live index and keyword DB (the
+    # unit tests add and delete notes) and both time their searches
     results = []
     for cmd, desc in tests:
         success = run_command(cmd, desc)
         results.append((desc, success))
-        time.sleep(1)
     
     # Summary
     print(f"\n{'='*60}")
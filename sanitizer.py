@@ -1,10 +1,37 @@
 """
 Input sanitization for security protection.
 """
+import os
 import re
 import html
 from typing import Any, Dict, List, Optional
 import unicodedata
+from functools import lru_cache
+from itertools import islice
+
+
+class _ControlCharTable(dict):
+    """str.translate table that drops Unicode "C" category characters.
+    
+    Entries are filled in the first time a codepoint is seen, so repeat
+    characters are a C-level dict hit during translate.
+    """
+    
+    def __missing__(self, codepoint: int):
+        char = chr(codepoint)
+        value = None if unicodedata.category(char)[0] == 'C' and char not in '\n\r\t' else codepoint
+        self[codepoint] = value
+        return value
+
+
+_CTRL_TABLE = _ControlCharTable()
+
+SHORT_TEXT_LENGTH = 64  # Below this sanitize_text takes the short-input path
+
+# Whitespace other than newlines; around a newline it is dropped, elsewhere
+# collapsed to one space (same as ' '.join(line.split()) per line)
+_LINE_EDGE_WS_RE = re.compile(r'[^\S\n]*\n[^\S\n]*')
+_WS_RE = re.compile(r'[^\S\n]+')
 
 class InputSanitizer:
     """Sanitize user inputs for security."""
@@ -36,11 +63,39 @@ class InputSanitizer:
         r"%252e%252e",
     ]
     
+    # Compiled once; each group is applied one pattern after another, in list
+    # order, since later patterns see what earlier ones left behind
+    _SQL_RES = tuple(re.compile(p, re.IGNORECASE) for p in SQL_PATTERNS)
+    _QUERY_SQL_RES = _SQL_RES[:3]  # Only the most relevant patterns
+    _SCRIPT_RES = tuple(re.compile(p, re.IGNORECASE) for p in SCRIPT_PATTERNS)
+    _PATH_RES = tuple(re.compile(p, re.IGNORECASE) for p in PATH_TRAVERSAL_PATTERNS)
+    _QUERY_SPECIAL_RE = re.compile(r'[\\^$*+?()[\]{}|]')
+    _FILENAME_UNSAFE_RE = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+    _METADATA_KEY_UNSAFE_RE = re.compile(r'[^\w\-_.]')
+    
+    # Local/internal addresses and non-HTTP schemes, as one alternation
+    _BLOCKED_URL_RE = re.compile(
+        r'localhost|127\.0\.0\.1|192\.168\.|10\.|172\.(?:1[6-9]|2[0-9]|3[0-1])\.'
+        r'|169\.254\.|::1|file://|ftp://',
+        re.IGNORECASE
+    )
+    
+    # Every SCRIPT_PATTERNS match needs one of these characters after escaping
+    # (<, :, = or the open paren), and every PATH_TRAVERSAL_PATTERNS match needs
+    # a dot, backslash or percent sign
+    _SCRIPT_CHARS = frozenset('<:=(')
+    _ESCAPE_CHARS = frozenset('&<>"\'')  # Everything html.escape rewrites
+    _PATH_CHARS = frozenset('.\\%')
+    
     def __init__(self):
         self.max_text_length = 10000
         self.max_query_length = 500
         self.max_metadata_key_length = 100
         self.max_metadata_value_length = 1000
+        self._int_min = -(1 << 31)
+        self._int_max = (1 << 31) - 1
+        self._float_min = -1e10
+        self._float_max = 1e10
     
     def sanitize_text(self, text: str, max_length: Optional[int] = None) -> str:
         """Sanitize text input for storage."""
@@ -53,31 +108,57 @@ class InputSanitizer:
         # Truncate to max length
         text = text[:max_len]
         
+        if len(text) < SHORT_TEXT_LENGTH:
+            return self._sanitize_short(text)
+        
         # Remove null bytes and control characters
-        text = text.replace('\x00', '')
-        text = ''.join(char for char in text if unicodedata.category(char)[0] != 'C' or char in '\n\r\t')
+        text = text.translate(_CTRL_TABLE)
         
-        # HTML escape
-        text = html.escape(text)
+        # HTML escape (most text has nothing to escape)
+        if not self._ESCAPE_CHARS.isdisjoint(text):
+            text = html.escape(text)
         
         # Remove potential SQL injection patterns
-        for pattern in self.SQL_PATTERNS:
-            text = re.sub(pattern, "[REMOVED]", text, flags=re.IGNORECASE)
+        for rx in self._SQL_RES:
+            text = rx.sub("[REMOVED]", text)
         
         # Remove potential XSS patterns
-        for pattern in self.SCRIPT_PATTERNS:
-            text = re.sub(pattern, "[REMOVED]", text, flags=re.IGNORECASE)
+        for rx in self._SCRIPT_RES:
+            text = rx.sub("[REMOVED]", text)
         
         # Remove path traversal attempts
-        for pattern in self.PATH_TRAVERSAL_PATTERNS:
-            text = re.sub(pattern, "", text, flags=re.IGNORECASE)
-        
-        # Normalize whitespace (preserve newlines for readability)
-        lines = text.split('\n')
-        normalized_lines = [' '.join(line.split()) for line in lines]
-        text = '\n'.join(normalized_lines)
+        for rx in self._PATH_RES:
+            text = rx.sub("", text)
         
-        return text.strip()
+        return self._normalize_whitespace(text)
+    
+    def _sanitize_short(self, text: str) -> str:
+        """sanitize_text for short inputs such as queries.
+        
+        Same result as the full path; the script and path passes only run
+        when the text holds a character their patterns need.
+        """
+        text = text.translate(_CTRL_TABLE)
+        if not self._ESCAPE_CHARS.isdisjoint(text):
+            text = html.escape(text)
+        for rx in self._SQL_RES:
+            text = rx.sub("[REMOVED]", text)
+        
+        if not self._SCRIPT_CHARS.isdisjoint(text):
+            for rx in self._SCRIPT_RES:
+                text = rx.sub("[REMOVED]", text)
+        
+        if not self._PATH_CHARS.isdisjoint(text):
+            for rx in self._PATH_RES:
+                text = rx.sub("", text)
+        
+        return self._normalize_whitespace(text)
+    
+    @staticmethod
+    def _normalize_whitespace(text: str) -> str:
+        """Collapse whitespace runs within each line (newlines are kept)."""
+        text = _LINE_EDGE_WS_RE.sub('\n', text)
+        return _WS_RE.sub(' ', text).strip()
     
     def sanitize_query(self, query: str) -> str:
         """Sanitize search query input."""
@@ -88,11 +169,11 @@ class InputSanitizer:
         query = query[:self.max_query_length]
         
         # Remove regex special characters that could break search
-        query = re.sub(r'[\\^$*+?()[\]{}|]', ' ', query)
+        query = self._QUERY_SPECIAL_RE.sub(' ', query)
         
-        # Remove SQL-like patterns
-        for pattern in self.SQL_PATTERNS[:3]:  # Use only the most relevant patterns
-            query = re.sub(pattern, "", query, flags=re.IGNORECASE)
+        # Remove SQL-like patterns (only the most relevant ones)
+        for rx in self._QUERY_SQL_RES:
+            query = rx.sub("", query)
         
         # Remove excessive whitespace
         query = ' '.join(query.split())
@@ -108,15 +189,14 @@ class InputSanitizer:
             return "unnamed"
         
         # Get base name without path
-        import os
         filename = os.path.basename(filename)
         
         # Remove dangerous characters
-        filename = re.sub(r'[<>:"/\\|?*\x00-\x1f]', '_', filename)
+        filename = self._FILENAME_UNSAFE_RE.sub('_', filename)
         
         # Remove path traversal patterns
-        for pattern in self.PATH_TRAVERSAL_PATTERNS:
-            filename = re.sub(pattern, "", filename, flags=re.IGNORECASE)
+        for rx in self._PATH_RES:
+            filename = rx.sub("", filename)
         
         # Limit length
         name, ext = os.path.splitext(filename)
@@ -139,23 +219,32 @@ class InputSanitizer:
         clean_meta = {}
         
         # Limit number of metadata fields
-        for key, value in list(metadata.items())[:50]:
+        for key, value in islice(metadata.items(), 50):
             # Sanitize key
             clean_key = self.sanitize_text(str(key), max_length=self.max_metadata_key_length)
-            clean_key = re.sub(r'[^\w\-_.]', '_', clean_key)  # Allow only safe characters in keys
+            clean_key = self._METADATA_KEY_UNSAFE_RE.sub('_', clean_key)  # Allow only safe characters in keys
             
             if not clean_key:
                 continue
             
-            # Sanitize value based on type
-            if isinstance(value, str):
+            # Sanitize value based on type; exact types first, most common first
+            t = type(value)
+            if t is str:
+                clean_value = self.sanitize_text(value, max_length=self.max_metadata_value_length)
+            elif t is int:
+                clean_value = max(self._int_min, min(self._int_max, value))
+            elif t is float:
+                clean_value = float(max(self._float_min, min(self._float_max, value)))
+            elif t is bool:
+                clean_value = value
+            elif isinstance(value, str):
                 clean_value = self.sanitize_text(value, max_length=self.max_metadata_value_length)
             elif isinstance(value, (int, float)):
                 # Validate numeric ranges
                 if isinstance(value, int):
-                    clean_value = max(-2**31, min(2**31-1, value))
+                    clean_value = max(self._int_min, min(self._int_max, value))
                 else:
-                    clean_value = float(max(-1e10, min(1e10, value)))
+                    clean_value = float(max(self._float_min, min(self._float_max, value)))
             elif isinstance(value, bool):
                 clean_value = bool(value)
             elif isinstance(value, list):
@@ -197,31 +286,25 @@ class InputSanitizer:
     
     def is_safe_url(self, url: str) -> bool:
         """Check if URL is safe to fetch."""
-        if not url:
-            return False
-        
-        # Must start with http(s)
-        if not url.startswith(('http://', 'https://')):
-            return False
-        
-        # Block local/internal addresses
-        blocked_patterns = [
-            r'localhost',
-            r'127\.0\.0\.1',
-            r'192\.168\.',
-            r'10\.',
-            r'172\.(1[6-9]|2[0-9]|3[0-1])\.',
-            r'169\.254\.',
-            r'::1',
-            r'file://',
-            r'ftp://',
-        ]
-        
-        for pattern in blocked_patterns:
-            if re.search(pattern, url, re.IGNORECASE):
-                return False
-        
-        return True
+        return _is_safe_url_cached(url)
+
+
+@lru_cache(maxsize=4096)
+def _is_safe_url_cached(url: str) -> bool:
+    """Memoized body of InputSanitizer.is_safe_url (URLs recur a lot)."""
+    if not url:
+        return False
+    
+    # Must start with http(s)
+    if not url.startswith(('http://', 'https://')):
+        return False
+    
+    # Block local/internal addresses
+    if InputSanitizer._BLOCKED_URL_RE.search(url):
+        return False
+    
+    return True
+
 
 # Global sanitizer instance
 sanitizer = InputSanitizer()
@@ -1,17 +1,34 @@
 """Enhanced search with multi-strategy approach for better recall."""
 import re
 import string
+import math
+import time
+import heapq
+import atexit
+import operator
+import threading
+import concurrent.futures
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import List, Tuple, Dict, Any, Set
-from vec_memory import search as basic_search
+from vec_memory import search as basic_search, embed_texts, search_by_vector, write_generation
 from keyword_search import get_keyword_index
 
+# Aho-Corasick automaton (C) for finding every synonym key in one pass
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
 # Common stop words to remove for key term extraction
-STOP_WORDS = {
+STOP_WORDS = frozenset({
     'the', 'is', 'at', 'which', 'on', 'a', 'an', 'as', 'are', 'was', 'were',
     'been', 'be', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
     'could', 'should', 'may', 'might', 'must', 'shall', 'can', 'need', 'my',
     'what', 'how', 'when', 'where', 'who', 'why', 'list', 'give', 'tell', 'show'
-}
+})
 
 # Synonym mappings for query expansion - Enhanced for Demo Document
 SYNONYMS = {
@@ -46,108 +63,168 @@ SYNONYMS = {
     'help': ['assist', 'aid', 'support', 'facilitate'],
 }
 
+# Patterns pulled out of queries by extract_patterns
+_DOLLAR_RE = re.compile(r'\$[\d,]+(?:\.\d{2})?')
+_PERCENT_RE = re.compile(r'\d+(?:\.\d+)?%')
+_TIME_RE = re.compile(r'\d+[-–]\d+\s*(?:month|year|week|day)s?')  # e.g. "18-24 months"
+_NUMBER_RE = re.compile(r'\b\d+\b')
+_DIGIT_RE = re.compile(r'\d')  # Every pattern above needs one
+
+
+# SYNONYMS entries by position; found keys are processed in this order
+_SYNONYM_ENTRIES = tuple(SYNONYMS.items())
+_SYNONYM_MIN_LEN = min(map(len, SYNONYMS))  # Shorter queries can't contain a key
+
+# rewrite_question's question-word prefixes; shorter queries match no branch
+_QUESTION_PREFIXES = ("what", "how", "which")
+_REWRITE_MIN_LEN = 3
+
+
+def _build_synonym_automaton():
+    """Automaton mapping each SYNONYMS key to its entry index, or None without pyahocorasick."""
+    if not HAS_AHOCORASICK:
+        return None
+    automaton = ahocorasick.Automaton()
+    for rank, (word, _) in enumerate(_SYNONYM_ENTRIES):
+        automaton.add_word(word, rank)
+    automaton.make_automaton()
+    return automaton
+
 
+_SYNONYM_AUTOMATON = _build_synonym_automaton()
+
+# enhanced_search result cache; entries are dropped when this process writes
+# to the index, and after the TTL (other processes may write too)
+ENHANCED_CACHE_SIZE = 512
+ENHANCED_CACHE_TTL = 300  # seconds
+QUERY_CACHE_SIZE = 1024  # Memoized results of the per-query helpers below
+# On an exact-cache miss, a recent query whose embedding is at least this
+# cosine-similar (same k, same index state) lends its results instead
+SEMANTIC_CACHE_SIZE = 64
+SEMANTIC_CACHE_SIMILARITY = 0.97
+# score_result switches from per-needle substring tests to one automaton
+# scan at this many distinct needles (below it the C-level 'in' tests win)
+SCORE_AUTOMATON_MIN_NEEDLES = 10
+
+# Queued queries whose embeddings are at least this cosine-similar to an
+# earlier one retrieve the same neighbours, so only the earlier one is searched
+QUERY_DEDUP_SIMILARITY = 0.97
+
+# enhanced_search's vector queries are independent network round trips
+# (embedding + index query), so they run side by side on this pool
+_SEARCH_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix="enhanced-search")
+atexit.register(_SEARCH_POOL.shutdown, wait=False)
+
+# Recent enhanced_search results by query embedding:
+# (vector, norm, k, generation, ttl_bucket, results)
+_semantic_cache: deque = deque(maxlen=SEMANTIC_CACHE_SIZE)
+_semantic_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
 def extract_key_terms(query: str) -> str:
     """Extract key terms by removing stop words."""
-    words = query.lower().split()
-    key_words = [w for w in words if w not in STOP_WORDS and len(w) > 2]
-    return ' '.join(key_words) if key_words else query
+    key_words = ' '.join([w for w in query.lower().split() if len(w) > 2 and w not in STOP_WORDS])
+    return key_words or query
 
 
 def extract_patterns(query: str) -> List[str]:
     """Extract numbers, dollar amounts, percentages, and time periods."""
+    return list(_extract_patterns(query))
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _extract_patterns(query: str) -> Tuple[str, ...]:
     patterns = []
     
+    # One scan settles the common case of a query with no digits at all
+    if not _DIGIT_RE.search(query):
+        return ()
+    
     # Dollar amounts
-    dollar_pattern = r'\$[\d,]+(?:\.\d{2})?'
-    patterns.extend(re.findall(dollar_pattern, query))
+    patterns.extend(_DOLLAR_RE.findall(query))
     
     # Percentages
-    percent_pattern = r'\d+(?:\.\d+)?%'
-    patterns.extend(re.findall(percent_pattern, query))
+    patterns.extend(_PERCENT_RE.findall(query))
     
     # Time periods (e.g., "18-24 months", "2 years")
-    time_pattern = r'\d+[-–]\d+\s*(?:month|year|week|day)s?'
-    patterns.extend(re.findall(time_pattern, query))
+    patterns.extend(_TIME_RE.findall(query))
     
     # Simple numbers
-    number_pattern = r'\b\d+\b'
-    patterns.extend(re.findall(number_pattern, query))
+    patterns.extend(_NUMBER_RE.findall(query))
     
-    return patterns
+    return tuple(patterns)
 
 
 def expand_with_synonyms(query: str) -> List[str]:
     """Generate query variations using synonyms."""
+    return list(_expand_with_synonyms(query))
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _expand_with_synonyms(query: str) -> Tuple[str, ...]:
     variations = [query]
     query_lower = query.lower()
+    if len(query_lower) < _SYNONYM_MIN_LEN:
+        return (query,)
     
-    for word, synonyms in SYNONYMS.items():
-        if word in query_lower:
-            for synonym in synonyms:
-                # Replace word with synonym
-                variation = query_lower.replace(word, synonym)
-                variations.append(variation)
+    if _SYNONYM_AUTOMATON is not None:
+        # One scan finds every key, overlapping ones included; only the keys
+        # present are visited below
+        found = sorted({rank for _, rank in _SYNONYM_AUTOMATON.iter(query_lower)})
+    else:
+        found = [rank for rank, (word, _) in enumerate(_SYNONYM_ENTRIES) if word in query_lower]
+    
+    for rank in found:
+        word, synonyms = _SYNONYM_ENTRIES[rank]
+        for synonym in synonyms:
+            # Replace word with synonym
+            variation = query_lower.replace(word, synonym)
+            variations.append(variation)
     
-    return variations
+    return tuple(variations)
 
 
 def rewrite_question(query: str) -> List[str]:
     """Rewrite questions into more searchable formats."""
+    return list(_rewrite_question(query))
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _rewrite_question(query: str) -> Tuple[str, ...]:
     rewrites = [query]
     query_lower = query.lower()
-    
-    # Question pattern transformations
-    if query_lower.startswith("what"):
-        # "What is X?" -> "X is"
-        core = query.replace("?", "").replace("What is", "").replace("What are", "").strip()
-        rewrites.append(f"{core} is")
-        rewrites.append(f"{core} are")
-        rewrites.append(core)
-    
-    if query_lower.startswith("how"):
-        # "How does X?" -> "X by", "X through"
-        core = query.replace("?", "").replace("How does", "").replace("How do", "").replace("How should", "").strip()
-        rewrites.append(core)
-        rewrites.append(f"{core} by")
-        rewrites.append(f"{core} through")
-        rewrites.append(f"{core} using")
-    
-    if query_lower.startswith("which"):
-        # "Which X are mentioned?" -> "X include", "X such as"
-        core = query.replace("?", "").replace("Which", "").replace("are mentioned", "").strip()
-        rewrites.append(f"{core} include")
-        rewrites.append(f"{core} such as")
-        rewrites.append(core)
+    if len(query_lower) < _REWRITE_MIN_LEN:
+        return (query,)
+    
+    # Question pattern transformations (the prefixes are mutually exclusive)
+    if query_lower.startswith(_QUESTION_PREFIXES):
+        if query_lower.startswith("what"):
+            # "What is X?" -> "X is"
+            core = query.replace("?", "").replace("What is", "").replace("What are", "").strip()
+            rewrites.append(f"{core} is")
+            rewrites.append(f"{core} are")
+            rewrites.append(core)
+        elif query_lower.startswith("how"):
+            # "How does X?" -> "X by", "X through"
+            core = query.replace("?", "").replace("How does", "").replace("How do", "").replace("How should", "").strip()
+            rewrites.append(core)
+            rewrites.append(f"{core} by")
+            rewrites.append(f"{core} through")
+            rewrites.append(f"{core} using")
+        else:
+            # "Which X are mentioned?" -> "X include", "X such as"
+            core = query.replace("?", "").replace("Which", "").replace("are mentioned", "").strip()
+            rewrites.append(f"{core} include")
+            rewrites.append(f"{core} such as")
+            rewrites.append(core)
     
     # Specific query patterns
-    if "three generations" in query_lower:
-        rewrites.extend([
-            "first generation second generation third generation",
-            "evolution from chatbots cognitive companions",
-            "rule based pattern cognitive"
-        ])
-    
-    if "api key" in query_lower:
-        rewrites.extend([
-            "API Key Management never expose",
-            "never exposing API keys",
-            "environment variables secure vaults"
-        ])
-    
-    if "hybrid search" in query_lower:
-        rewrites.extend([
-            "combining semantic keyword",
-            "semantic search keyword matching"
-        ])
-    
-    if "circular architecture" in query_lower:
-        rewrites.extend([
-            "User Input Embedding Vector Search",
-            "architecture overview"
-        ])
-    
-    if "help" in query_lower or "helps" in query_lower:
+    for trigger, topic_rewrites in _TOPIC_REWRITES:
+        if trigger in query_lower:
+            rewrites.extend(topic_rewrites)
+    
+    if "help" in query_lower:  # Also covers "helps"
         # "What helps X?" -> "X enhancement", "X improvement"
         rewrites.append(query.replace("helps", "enhances"))
         rewrites.append(query.replace("help", "enhance"))
@@ -171,33 +248,63 @@ def rewrite_question(query: str) -> List[str]:
         rewrites.append(query.replace("enable", "allow"))
         rewrites.append(query.replace("enable", "provide"))
     
-    return list(set(rewrites))  # Remove duplicates
+    return tuple(dict.fromkeys(rewrites))  # Remove duplicates, keeping order
 
 
-def score_result(text: str, query: str) -> float:
-    """Score a result based on relevance to query."""
+@dataclass(frozen=True)
+class _ScoreCtx:
+    """Query-derived values for score_result, computed once per query.
+    
+    Each distinct needle (the whole query, its words longer than 2
+    characters, its key terms) carries the total points it is worth:
+    10 for the whole query, 2 per query word, 3 per key term.
+    """
+    weights: Tuple[Tuple[str, float], ...]
+    min_needle_len: int
+    automaton: Any = field(default=None, compare=False, repr=False)
+    
+    @classmethod
+    def from_query(cls, query: str) -> "_ScoreCtx":
+        q_lower = query.lower()
+        weights: Dict[str, float] = {q_lower: 10.0}
+        for word in q_lower.split():
+            if len(word) > 2:
+                weights[word] = weights.get(word, 0.0) + 2.0
+        for term in extract_key_terms(query).lower().split():
+            weights[term] = weights.get(term, 0.0) + 3.0
+        
+        automaton = None
+        if HAS_AHOCORASICK and len(weights) >= SCORE_AUTOMATON_MIN_NEEDLES:
+            automaton = ahocorasick.Automaton()
+            for entry in weights.items():
+                automaton.add_word(entry[0], entry)
+            automaton.make_automaton()
+        return cls(tuple(weights.items()), min(map(len, weights)), automaton)
+
+
+def score_result(text: str, ctx: _ScoreCtx) -> float:
+    """Score a result based on relevance to the query in ctx."""
     if not text:
         return 0.0
     
+    # Too short for any needle to match, so skip lowercasing. lower() can at
+    # most double the length (U+0130 becomes two code points)
+    if 2 * len(text) < ctx.min_needle_len:
+        return 1.0 if len(text) > 100 else 0.0
+    
     score = 0.0
     text_lower = text.lower()
-    query_lower = query.lower()
-    
-    # Exact query match
-    if query_lower in text_lower:
-        score += 10.0
     
-    # Query words match
-    query_words = query_lower.split()
-    for word in query_words:
-        if len(word) > 2 and word in text_lower:
-            score += 2.0
-    
-    # Key terms match
-    key_terms = extract_key_terms(query).lower().split()
-    for term in key_terms:
-        if term in text_lower:
-            score += 3.0
+    # Query, query word and key term matches; a needle shared by several
+    # of those is searched for once
+    if ctx.automaton is not None:
+        # One pass finds every needle present; each still counts once
+        found = {entry for _, entry in ctx.automaton.iter(text_lower)}
+        score += sum(weight for _, weight in found)
+    else:
+        for needle, weight in ctx.weights:
+            if needle in text_lower:
+                score += weight
     
     # Length penalty (prefer more substantial content)
     if len(text) > 100:
@@ -214,18 +321,19 @@ def deduplicate_results(
     """Deduplicate results from multiple searches and return top k."""
     seen_ids: Set[str] = set()
     unique_results = []
+    ctx = _ScoreCtx.from_query(query) if query else None
     
     for results in results_list:
         for result_id, text, metadata in results:
             if result_id not in seen_ids:
                 seen_ids.add(result_id)
                 # Add score to metadata for ranking
-                score = score_result(text, query) if query else 0
+                score = score_result(text, ctx) if ctx else 0
                 unique_results.append((result_id, text, metadata, score))
     
-    # Sort by score if query provided
+    # Top k by score if query provided (nlargest keeps ties in order, like a stable sort)
     if query:
-        unique_results.sort(key=lambda x: x[3], reverse=True)
+        unique_results = heapq.nlargest(k, unique_results, key=lambda x: x[3])
     
     # Return top k results (without score)
     return [(r[0], r[1], r[2]) for r in unique_results[:k]]
@@ -250,12 +358,10 @@ def reciprocal_rank_fusion(results_lists: List[List[Tuple[str, float]]], k: int
     Reciprocal Rank Fusion (RRF) for combining multiple ranked lists.
     k=60 is a commonly used constant in RRF.
     """
-    rrf_scores = {}
+    rrf_scores = defaultdict(float)
     
     for results in results_lists:
         for rank, (doc_id, _) in enumerate(results, 1):
-            if doc_id not in rrf_scores:
-                rrf_scores[doc_id] = 0
             rrf_scores[doc_id] += 1 / (k + rank)
     
     return rrf_scores
@@ -316,31 +422,23 @@ def hybrid_search(
         combined_scores = {}
         doc_data = {}
         
-        # Process vector results
-        vector_scores = []
+        # Process vector results. They all carry the same rank-based score
+        # (1.0), which normalize_scores maps to 0.5
         for doc_id, text, metadata in vector_results:
-            vector_scores.append((doc_id, 1.0))  # Use rank-based score
+            combined_scores[doc_id] = alpha * 0.5
             doc_data[doc_id] = (text, metadata)
         
-        # Normalize vector scores
-        if vector_scores:
-            normalized_vector = normalize_scores([s for _, s in vector_scores])
-            for i, (doc_id, _) in enumerate(vector_scores):
-                combined_scores[doc_id] = alpha * normalized_vector[i]
-        
         # Process keyword results
         if keyword_results:
             keyword_scores = [s for _, s, _ in keyword_results]
             normalized_keyword = normalize_scores(keyword_scores)
             
-            for i, (doc_id, bm25_score, content) in enumerate(keyword_results):
-                if doc_id in combined_scores:
-                    # Document found in both - add keyword score
-                    combined_scores[doc_id] += (1 - alpha) * normalized_keyword[i]
-                else:
+            keyword_weight = 1 - alpha
+            for (doc_id, _, content), normalized in zip(keyword_results, normalized_keyword):
+                if doc_id not in combined_scores:
                     # Document only in keyword search
-                    combined_scores[doc_id] = (1 - alpha) * normalized_keyword[i]
                     doc_data[doc_id] = (content, {})
+                combined_scores[doc_id] = combined_scores.get(doc_id, 0.0) + keyword_weight * normalized
         
         # Sort by combined score and return top k
         sorted_ids = sorted(combined_scores.items(), key=lambda x: x[1], reverse=True)
@@ -353,10 +451,15 @@ def hybrid_search(
         return results
 
 
+class _NoResults(Exception):
+    """Raised inside the memoized search so empty results aren't cached."""
+
+
 def enhanced_search(query: str, k: int = 5) -> List[Tuple[str, str, Dict[str, Any]]]:
     """
     Ultra-aggressive multi-strategy search for maximum recall.
     Uses extensive query expansion and multiple search passes.
+    Repeat queries are served from a cache (see ENHANCED_CACHE_TTL).
     
     Returns: [(id, text, metadata)]
     """
@@ -364,15 +467,164 @@ def enhanced_search(query: str, k: int = 5) -> List[Tuple[str, str, Dict[str, An
     if not query or not query.strip():
         return []
     
-    all_results = []
-    query_lower = query.lower()
+    try:
+        cached = _cached_enhanced_search(
+            query, k, write_generation(), int(time.time() // ENHANCED_CACHE_TTL)
+        )
+    except _NoResults:
+        return []
+    # Callers get their own metadata dicts so the cached ones stay intact
+    return [(doc_id, text, dict(metadata)) for doc_id, text, metadata in cached]
+
+
+def clear_search_cache():
+    """Drop every cached enhanced_search result."""
+    _cached_enhanced_search.cache_clear()
+    with _semantic_cache_lock:
+        _semantic_cache.clear()
+
+
+@lru_cache(maxsize=ENHANCED_CACHE_SIZE)
+def _cached_enhanced_search(query: str, k: int, generation: int, ttl_bucket: int) -> Tuple:
+    """Memoized _run_enhanced_search; generation and ttl_bucket only key the cache."""
+    try:
+        # Also warms the embedding cache for the batch embedding that follows
+        vector = embed_texts([query])[0]
+    except Exception:
+        vector = None
+    if vector is not None:
+        norm = math.sqrt(sum(map(operator.mul, vector, vector))) or 1.0
+        cached = _semantic_lookup(vector, norm, k, generation, ttl_bucket)
+        if cached is not None:
+            return cached
+    
+    results = _run_enhanced_search(query, k)
+    if not results:
+        raise _NoResults()
+    results = tuple(results)
+    if vector is not None:
+        with _semantic_cache_lock:
+            _semantic_cache.append((vector, norm, k, generation, ttl_bucket, results))
+    return results
+
+
+def _semantic_lookup(vector: List[float], norm: float, k: int, generation: int, ttl_bucket: int) -> Tuple | None:
+    """Results of the most similar recent query above SEMANTIC_CACHE_SIMILARITY, if any."""
+    with _semantic_cache_lock:
+        entries = tuple(_semantic_cache)
+    best, best_similarity = None, SEMANTIC_CACHE_SIMILARITY
+    for cached_vector, cached_norm, cached_k, cached_generation, cached_bucket, results in entries:
+        if (cached_k, cached_generation, cached_bucket) != (k, generation, ttl_bucket):
+            continue
+        similarity = sum(map(operator.mul, vector, cached_vector)) / (norm * cached_norm)
+        if similarity >= best_similarity:
+            best, best_similarity = results, similarity
+    return best
+
+
+# Fixed rewrites added by rewrite_question when a topic phrase appears
+_TOPIC_REWRITES = (
+    ("three generations", (
+        "first generation second generation third generation",
+        "evolution from chatbots cognitive companions",
+        "rule based pattern cognitive",
+    )),
+    ("api key", (
+        "API Key Management never expose",
+        "never exposing API keys",
+        "environment variables secure vaults",
+    )),
+    ("hybrid search", (
+        "combining semantic keyword",
+        "semantic search keyword matching",
+    )),
+    ("circular architecture", (
+        "User Input Embedding Vector Search",
+        "architecture overview",
+    )),
+)
+
+# Strategy 6 expansions: (cue words, suffixes searched after the core terms)
+_DOMAIN_EXPANSIONS = (
+    # Technology/tool/database: listings and comparisons
+    (('database', 'tool', 'technology', 'system', 'model'),
+     (" offers provides includes", " such as like including")),
+    # Processes/methods: imperatives and recommendations
+    (('how', 'should', 'manage', 'handle', 'process'),
+     (" requires never always should must",)),
+    # Benefits/features: outcomes and capabilities
+    (('benefit', 'help', 'transform', 'enable', 'improve'),
+     (" enables allows provides helps",)),
+)
+
+
+def _add_query(queries: Dict[str, int], query: str, k: int):
+    """Queue a vector search; a query already queued keeps its place and the larger k."""
+    if k > queries.get(query, 0):
+        queries[query] = k
+
+
+def _submit_searches(queries: Dict[str, int]) -> List[concurrent.futures.Future]:
+    """Start the queued vector searches, one future per query in queue order.
     
-    # Strategy 1: Original query with MORE candidates
+    All queries are embedded in one request and only the index lookups run
+    per query; if the batch embedding fails, each query is searched on its own.
+    """
+    texts = list(queries)
     try:
-        original_results = basic_search(query, k=k*4)  # Get many more results
-        all_results.append(original_results)
+        vectors = embed_texts(texts)
     except Exception:
-        pass
+        vectors = None
+    if vectors is None or len(vectors) != len(texts) or any(v is None for v in vectors):
+        return [_SEARCH_POOL.submit(basic_search, q, k=qk) for q, qk in queries.items()]
+    return [
+        _SEARCH_POOL.submit(search_by_vector, v, qk)
+        for v, qk in _distinct_vectors(vectors, [queries[q] for q in texts])
+    ]
+
+
+def _distinct_vectors(vectors: List[List[float]], ks: List[int]) -> List[Tuple[List[float], int]]:
+    """Greedily drop vectors within QUERY_DEDUP_SIMILARITY of an earlier kept one.
+    
+    A dropped query's k is folded into the query that absorbed it (larger wins).
+    """
+    kept: List[List] = []  # [vector, norm, k]
+    for vector, k in zip(vectors, ks):
+        norm = math.sqrt(sum(map(operator.mul, vector, vector))) or 1.0
+        for entry in kept:
+            similarity = sum(map(operator.mul, vector, entry[0])) / (norm * entry[1])
+            if similarity >= QUERY_DEDUP_SIMILARITY:
+                entry[2] = max(entry[2], k)
+                break
+        else:
+            kept.append([vector, norm, k])
+    return [(vector, k) for vector, _, k in kept]
+
+
+def _merge_results(
+    merged: Dict[str, Tuple[str, Dict[str, Any], float]],
+    results,
+    ctx: _ScoreCtx
+):
+    """Add (id, text, metadata) results not seen yet, scored as they arrive."""
+    for result_id, text, metadata in results:
+        if result_id not in merged:
+            merged[result_id] = (text, metadata, score_result(text, ctx))
+
+
+def _run_enhanced_search(query: str, k: int) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """The uncached multi-strategy search behind enhanced_search."""
+    # id -> (text, metadata, score); the first strategy to return an id wins
+    merged: Dict[str, Tuple[str, Dict[str, Any], float]] = {}
+    ctx = _ScoreCtx.from_query(query)
+    query_lower = query.lower()
+    
+    # Strategies often produce the same query string (e.g. a rewrite equal to
+    # the key terms), so queue them first and search each distinct one once
+    queries: Dict[str, int] = {}
+    
+    # Strategy 1: Original query with MORE candidates
+    _add_query(queries, query, k*4)  # Get many more results
     
     # Strategy 2: Aggressive query rewriting
     rewrites = rewrite_question(query)
@@ -389,113 +641,76 @@ def enhanced_search(query: str, k: int = 5) -> List[Tuple[str, str, Dict[str, An
     # Search with top rewrites (limit for performance)
     for rewrite in rewrites[:3]:  # Reduced from 5 to 3
         if rewrite != query:
-            try:
-                rewrite_results = basic_search(rewrite, k=k)  # Reduced from k*2
-                all_results.append(rewrite_results)
-            except Exception:
-                pass
+            _add_query(queries, rewrite, k)  # Reduced from k*2
     
     # Strategy 3: Extract and search ALL key terms
     key_terms = extract_key_terms(query)
     if key_terms != query:
-        try:
-            key_results = basic_search(key_terms, k=k*2)
-            all_results.append(key_results)
-        except Exception:
-            pass
+        _add_query(queries, key_terms, k*2)
     
     # Also search individual important words
     words = query_lower.split()
     important_words = [w for w in words if len(w) > 3 and w not in STOP_WORDS]
     for word in important_words[:3]:
-        try:
-            word_results = basic_search(word, k=3)
-            all_results.append(word_results)
-        except Exception:
-            pass
+        _add_query(queries, word, 3)
     
     # Strategy 4: Pattern extraction - search for all patterns
     patterns = extract_patterns(query)
     for pattern in patterns:  # Use ALL patterns
-        try:
-            pattern_results = basic_search(pattern, k=3)
-            all_results.append(pattern_results)
-        except Exception:
-            pass
+        _add_query(queries, pattern, 3)
     
     # Strategy 5: Synonym variations - be more aggressive
     variations = expand_with_synonyms(query)
     for variation in variations[1:3]:  # Limit to 2 variations for performance
-        try:
-            var_results = basic_search(variation, k=3)  # Reduced k
-            all_results.append(var_results)
-        except Exception:
-            pass
+        _add_query(queries, variation, 3)  # Reduced k
     
     # Strategy 6: Domain-specific expansions based on common patterns
     # These are learned from the document structure, not cherry-picked
     
-    # If asking about a technology/tool/database
-    if any(word in query_lower for word in ['database', 'tool', 'technology', 'system', 'model']):
-        # Search for listings and comparisons
-        try:
-            tech_results = basic_search(core + " offers provides includes", k=3)
-            all_results.append(tech_results)
-            tech_results2 = basic_search(core + " such as like including", k=3)
-            all_results.append(tech_results2)
-        except Exception:
-            pass
-    
-    # If asking about processes/methods
-    if any(word in query_lower for word in ['how', 'should', 'manage', 'handle', 'process']):
-        # Search for imperatives and recommendations
-        try:
-            process_results = basic_search(core + " requires never always should must", k=3)
-            all_results.append(process_results)
-        except Exception:
-            pass
-    
-    # If asking about benefits/features
-    if any(word in query_lower for word in ['benefit', 'help', 'transform', 'enable', 'improve']):
-        # Search for outcomes and capabilities
-        try:
-            benefit_results = basic_search(core + " enables allows provides helps", k=3)
-            all_results.append(benefit_results)
-        except Exception:
-            pass
+    for cues, suffixes in _DOMAIN_EXPANSIONS:
+        if any(cue in query_lower for cue in cues):
+            for suffix in suffixes:
+                _add_query(queries, core + suffix, 3)
     
     # If asking about definitions
     if any(word in query_lower for word in ['what is', 'what are', 'define']):
         # Search for "X is" patterns
         stripped = query_lower.replace('what is', '').replace('what are', '').replace('?', '').strip()
-        try:
-            def_results = basic_search(stripped + " is are represents", k=3)
-            all_results.append(def_results)
-        except Exception:
-            pass
+        _add_query(queries, stripped + " is are represents", 3)
     
-    # Strategy 7: Use keyword search aggressively
+    futures = _submit_searches(queries)
+    
+    # Strategy 7: Use keyword search aggressively. The in-memory BM25 index
+    # is scored on this thread while the vector searches are in flight
+    keyword_results = []
     keyword_index = get_keyword_index()
     if keyword_index.enabled:
-        # Search with full query
-        try:
-            kw_results = keyword_index.search(query, k=k*2)
-            kw_formatted = [(doc_id, content, {}) for doc_id, _, content in kw_results]
-            all_results.append(kw_formatted)
-        except Exception:
-            pass
-        
-        # Search with core terms
+        # Search with full query, then with core terms
+        keyword_queries = [(query, k*2)]
         if core and core != query:
+            keyword_queries.append((core, k))
+        for keyword_query, keyword_k in keyword_queries:
             try:
-                kw_core = keyword_index.search(core, k=k)
-                kw_formatted = [(doc_id, content, {}) for doc_id, _, content in kw_core]
-                all_results.append(kw_formatted)
+                keyword_results.append(keyword_index.search(keyword_query, k=keyword_k))
             except Exception:
                 pass
     
-    # Deduplicate and return top k results with scoring
-    return deduplicate_results(all_results, k=k, query=query)
+    # Results are merged in queue order (vector, then keyword) so ranking
+    # ties break as before
+    for future in futures:
+        try:
+            _merge_results(merged, future.result(), ctx)
+        except Exception:
+            pass
+    for kw_results in keyword_results:
+        try:
+            _merge_results(merged, ((doc_id, content, {}) for doc_id, _, content in kw_results), ctx)
+        except Exception:
+            pass
+    
+    # Return top k results by score (ties keep arrival order)
+    ranked = heapq.nlargest(k, merged.items(), key=lambda item: item[1][2])
+    return [(result_id, text, metadata) for result_id, (text, metadata, _) in ranked]
 
 
 # Maintain backward compatibility - now defaults to hybrid search
@@ -1,5 +1,7 @@
 """Basic test suite for Cognitive Companion App."""
 import pytest
+import random
+import re
 import time
 import uuid
 from pathlib import Path
@@ -11,7 +13,35 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from vec_memory import upsert_note, search, delete_by_ids, get_memory_stats
 from search_enhancements import enhanced_search, extract_key_terms, extract_patterns
-from improved_chunking import smart_chunks
+from improved_chunking import smart_chunks, smart_chunks_stream
+from load_with_overlap import create_overlapping_chunks, iter_overlapping_chunks
+
+
+def reference_overlapping_chunks(text: str, chunk_size: int, overlap: int) -> list:
+    """The original create_overlapping_chunks sentence-buffer loop."""
+    chunks = []
+    current_chunk = ""
+    sentence_buffer = []
+    for sentence in re.split(r'(?<=[.!?])\s+', text):
+        if not sentence.strip():
+            continue
+        if current_chunk and len(current_chunk) + len(sentence) > chunk_size:
+            chunks.append(current_chunk.strip())
+            overlap_text = ""
+            for sent in reversed(sentence_buffer):
+                if len(overlap_text) + len(sent) <= overlap:
+                    overlap_text = sent + " " + overlap_text
+                else:
+                    break
+            current_chunk = overlap_text
+            sentence_buffer = [s for s in sentence_buffer if s in overlap_text]
+        current_chunk += sentence + " "
+        sentence_buffer.append(sentence)
+        if len(sentence_buffer) > 5:
+            sentence_buffer.pop(0)
+    if current_chunk.strip():
+        chunks.append(current_chunk.strip())
+    return chunks
 
 
 class TestVectorMemory:
@@ -194,6 +224,80 @@ class TestChunking:
                 for chunk1, chunk2 in zip(chunks[:-1], chunks[1:])
             )
             assert overlap_found or len(chunks) == 1
+    
+    @pytest.mark.parametrize("text,chunk_size,overlap,expected", [
+        (
+            "One. Two two. Three three three. Four four four four. Five.", 20, 10,
+            ["One. Two two.", "Two two. Three three three.", "Four four four four.", "Five."],
+        ),
+        (
+            "Vector databases store embeddings. Hybrid search combines semantic and keyword "
+            "matching! Does caching help? Yes, it reduces API calls. Chunks overlap so "
+            "concepts are not cut in half.", 100, 60,
+            [
+                "Vector databases store embeddings. Hybrid search combines semantic and keyword matching!",
+                "Hybrid search combines semantic and keyword matching! Does caching help? Yes, it reduces API calls.",
+                "Does caching help? Yes, it reduces API calls. Chunks overlap so concepts are not cut in half.",
+            ],
+        ),
+        ("A single sentence without a break", 10, 5, ["A single sentence without a break"]),
+        ("", 400, 100, []),
+    ])
+    def test_create_overlapping_chunks(self, text, chunk_size, overlap, expected):
+        """Overlapping chunks match the original sentence-buffer implementation."""
+        assert create_overlapping_chunks(text, chunk_size=chunk_size, overlap=overlap) == expected
+    
+    @pytest.mark.parametrize("seed", range(20))
+    @pytest.mark.parametrize("chunk_size,overlap", [(40, 15), (120, 60), (400, 100)])
+    def test_chunk_bounds_match_sentence_buffer(self, seed, chunk_size, overlap):
+        """Integer boundary search gives the chunks of the original string loop."""
+        rng = random.Random(seed)
+        text = " ".join(
+            f"s{i} " + "x" * rng.randint(1, 80) + rng.choice(".!?")
+            for i in range(rng.randint(0, 40))
+        )
+        expected = reference_overlapping_chunks(text, chunk_size, overlap)
+        assert create_overlapping_chunks(text, chunk_size=chunk_size, overlap=overlap) == expected
+    
+    @pytest.mark.parametrize("pages", [
+        ["One. Two two. Three three three.", "Four four four four. Five."],
+        ["Vector databases store embeddings. Hybrid search combines semantic and keyword matching!",
+         "", "Does caching help? Yes, it reduces API calls.", "Chunks overlap so concepts are not cut in half."],
+        ["Page one has a sentence. " * 12, "Page two has another one. " * 12, "Last page."],
+    ])
+    @pytest.mark.parametrize("chunk_size,overlap", [(60, 20), (100, 60), (400, 100)])
+    def test_iter_overlapping_chunks_matches_joined_text(self, pages, chunk_size, overlap):
+        """Streaming pages gives the same chunks as the newline-joined text.
+        
+        Every sentence here fits in chunk_size; longer ones are cut (below).
+        """
+        expected = create_overlapping_chunks("\n".join(pages), chunk_size=chunk_size, overlap=overlap)
+        streamed = list(iter_overlapping_chunks(pages, chunk_size=chunk_size, overlap=overlap))
+        assert streamed == expected
+    
+    def test_iter_overlapping_chunks_bounds_long_sentences(self):
+        """Text without sentence punctuation is cut so no chunk exceeds chunk_size."""
+        pages = ["word " * 200, "more words " * 100]
+        chunks = list(iter_overlapping_chunks(pages, chunk_size=150, overlap=50))
+        
+        assert len(chunks) > 1
+        assert all(0 < len(chunk) <= 150 for chunk in chunks)
+    
+    @pytest.mark.parametrize("pages", [
+        ["This is sentence one. This is sentence two. This is sentence three."],
+        ["This is sentence one. This is sen", "tence two.", " This is sentence three."],
+        ["  Leading space. ", "", "Middle page.\n", "\x00Trailing text without a stop   "],
+        ["A" * 100 + " ", "B" * 100, " " + "C" * 100],
+        ["No punctuation here " * 20, "and still none " * 10],
+        ["Short."],
+        ["Ends with a boundary. ", "Next page starts. Another one! Last?"],
+    ])
+    @pytest.mark.parametrize("chunk_size,overlap", [(30, 10), (150, 50), (1200, 200)])
+    def test_smart_chunks_stream_matches_smart_chunks(self, pages, chunk_size, overlap):
+        """Streaming pages gives the same chunks as chunking the joined text."""
+        expected = smart_chunks("".join(pages), chunk_size=chunk_size, overlap=overlap)
+        streamed = list(smart_chunks_stream(pages, chunk_size=chunk_size, overlap=overlap))
+        assert streamed == expected
 
 
 def test_known_good_query():
@@ -0,0 +1,127 @@
+"""Tests for the token bucket rate limiter."""
+import pytest
+from unittest.mock import patch
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rate_limiter
+from rate_limiter import RateLimiter, LOCK_STRIPES
+
+SECOND_NS = 1_000_000_000
+
+
+class FakeClock:
+    """Stand-in for time.monotonic_ns that only moves when told to."""
+    
+    def __init__(self):
+        self.now_ns = 0
+    
+    def __call__(self) -> int:
+        return self.now_ns
+    
+    def advance(self, seconds: float):
+        self.now_ns += int(seconds * SECOND_NS)
+
+
+@pytest.fixture
+def clock():
+    """Patch the limiter's monotonic clock."""
+    fake = FakeClock()
+    with patch.object(rate_limiter.time, "monotonic_ns", fake):
+        yield fake
+
+
+class TestRateLimiter:
+    """Allow/deny/wait behaviour of RateLimiter."""
+    
+    @pytest.mark.parametrize("rate,burst", [(60, 1), (60, 5), (120, 30), (10, 5)])
+    def test_burst_allowed_then_denied(self, clock, rate, burst):
+        """A fresh key gets exactly `burst` requests before being denied."""
+        limiter = RateLimiter(rate=rate, burst=burst)
+        assert all(limiter.allow_request("user") for _ in range(burst))
+        assert not limiter.allow_request("user")
+    
+    def test_wait_time(self, clock):
+        """The wait is the time left until one whole token has refilled."""
+        limiter = RateLimiter(rate=60, burst=2)  # One token per second
+        assert limiter.get_wait_time("user") == 0.0
+        
+        limiter.allow_request("user")
+        limiter.allow_request("user")
+        assert limiter.get_wait_time("user") == pytest.approx(1.0, abs=1e-3)
+        
+        clock.advance(0.5)
+        assert not limiter.allow_request("user")
+        assert limiter.get_wait_time("user") == pytest.approx(0.5, abs=1e-3)
+    
+    def test_tokens_refill_over_time(self, clock):
+        """Requests are allowed again once tokens have refilled."""
+        limiter = RateLimiter(rate=60, burst=2)
+        limiter.allow_request("user")
+        limiter.allow_request("user")
+        
+        clock.advance(1.01)
+        assert limiter.allow_request("user")
+        assert not limiter.allow_request("user")
+    
+    def test_refill_is_capped_at_burst(self, clock):
+        """A long idle period never grants more than `burst` requests."""
+        limiter = RateLimiter(rate=60, burst=3)
+        limiter.allow_request("user")
+        
+        clock.advance(3600)
+        assert all(limiter.allow_request("user") for _ in range(3))
+        assert not limiter.allow_request("user")
+    
+    def test_keys_are_independent(self, clock):
+        """Exhausting one key doesn't limit another."""
+        limiter = RateLimiter(rate=60, burst=1)
+        assert limiter.allow_request("a")
+        assert not limiter.allow_request("a")
+        assert limiter.allow_request("b")
+    
+    def test_reset(self, clock):
+        """reset() refills one key, or every key."""
+        limiter = RateLimiter(rate=60, burst=1)
+        limiter.allow_request("a")
+        limiter.allow_request("b")
+        
+        limiter.reset("a")
+        assert limiter.allow_request("a")
+        assert not limiter.allow_request("b")
+        
+        limiter.reset()
+        assert limiter.allow_request("a")
+        assert limiter.allow_request("b")
+    
+    def test_decorator(self, clock):
+        """The decorator raises once the function's key is exhausted."""
+        limiter = RateLimiter(rate=60, burst=1)
+        
+        @limiter.decorator()
+        def ping():
+            return "pong"
+        
+        @limiter.decorator(get_key_func=lambda user: user)
+        def greet(user):
+            return f"hi {user}"
+        
+        assert ping() == "pong"
+        with pytest.raises(Exception, match="Rate limit exceeded"):
+            ping()
+        
+        assert greet("a") == "hi a"
+        assert greet("b") == "hi b"
+        with pytest.raises(Exception, match="Rate limit exceeded"):
+            greet("a")
+    
+    def test_bucket_count_is_bounded(self, clock):
+        """Old keys are evicted once every stripe is full."""
+        with patch.object(rate_limiter, "MAX_BUCKETS", LOCK_STRIPES):
+            limiter = RateLimiter(rate=60, burst=1)
+        for i in range(10 * LOCK_STRIPES):
+            limiter.allow_request(f"user-{i}")
+        assert len(limiter.buckets) <= LOCK_STRIPES
@@ -0,0 +1,102 @@
+"""Tests for input sanitization."""
+import pytest
+import re
+import html
+import unicodedata
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sanitizer import InputSanitizer, SHORT_TEXT_LENGTH
+
+
+def reference_sanitize_text(text: str, max_length: int = 10000) -> str:
+    """The original sanitize_text: one re.sub per pattern, in list order."""
+    if not text:
+        return ""
+    text = text[:max_length]
+    text = text.replace('\x00', '')
+    text = ''.join(char for char in text if unicodedata.category(char)[0] != 'C' or char in '\n\r\t')
+    text = html.escape(text)
+    for pattern in InputSanitizer.SQL_PATTERNS:
+        text = re.sub(pattern, "[REMOVED]", text, flags=re.IGNORECASE)
+    for pattern in InputSanitizer.SCRIPT_PATTERNS:
+        text = re.sub(pattern, "[REMOVED]", text, flags=re.IGNORECASE)
+    for pattern in InputSanitizer.PATH_TRAVERSAL_PATTERNS:
+        text = re.sub(pattern, "", text, flags=re.IGNORECASE)
+    lines = text.split('\n')
+    return '\n'.join(' '.join(line.split()) for line in lines).strip()
+
+
+SAMPLES = [
+    "../",
+    "..",
+    ".../etc/passwd here",
+    ".../x",
+    "....//....//etc/passwd",
+    "..\\windows\\system32",
+    "%2e%2e/%252e%252e/secret",
+    "1 UNION SELECT password FROM users",
+    "union all select * from t -- comment",
+    "name' OR 1=1; --",
+    "<script>alert(1)</script> and <iframe src=x></iframe>",
+    "javascript:eval(document.cookie) onload = x",
+    "WAITFOR DELAY '0:0:5'",
+    "plain text with\ttabs\nand  newlines \r\n kept",
+    "control\x00chars\x1cremoved\x85",
+]
+
+
+class TestSanitizeText:
+    """sanitize_text must keep the original pattern-by-pattern behaviour."""
+    
+    @pytest.mark.parametrize("text", SAMPLES)
+    @pytest.mark.parametrize("padding", ["", " filler" * 20])
+    def test_matches_reference(self, text, padding):
+        """Short and long inputs both sanitize exactly like the original."""
+        sanitizer = InputSanitizer()
+        padded = text + padding
+        assert sanitizer.sanitize_text(padded) == reference_sanitize_text(padded)
+    
+    def test_short_and_long_paths_agree(self):
+        """The short-input path gives the same result as the full path."""
+        sanitizer = InputSanitizer()
+        for text in SAMPLES:
+            assert len(text) < SHORT_TEXT_LENGTH
+            padded = text + " " * SHORT_TEXT_LENGTH
+            assert sanitizer.sanitize_text(text) == sanitizer.sanitize_text(padded)
+    
+    def test_path_traversal_removed_in_order(self):
+        """'../' is removed before '..', so leftover dots match the original."""
+        sanitizer = InputSanitizer()
+        assert sanitizer.sanitize_text(".../etc/passwd here") == ".etc/passwd here"
+        assert sanitizer.sanitize_text(".../x") == ".x"
+        assert sanitizer.sanitize_text("..") == ""
+    
+    def test_union_select_removed(self):
+        """SELECT is removed on its own before the UNION ... SELECT pattern runs."""
+        sanitizer = InputSanitizer()
+        result = sanitizer.sanitize_text("1 UNION SELECT password")
+        assert "SELECT" not in result
+        assert result == reference_sanitize_text("1 UNION SELECT password")
+
+
+class TestSanitizeQueryAndFilename:
+    """Query and filename sanitizers."""
+    
+    @pytest.mark.parametrize("query", SAMPLES)
+    def test_query_has_no_sql_keywords(self, query):
+        """The first three SQL patterns never survive in a sanitized query."""
+        result = InputSanitizer().sanitize_query(query)
+        for pattern in InputSanitizer.SQL_PATTERNS[:3]:
+            assert not re.search(pattern, result, flags=re.IGNORECASE)
+    
+    @pytest.mark.parametrize("filename", ["../../etc/passwd", "..\\..\\boot.ini", "a..b.pdf", ".."])
+    def test_filename_has_no_traversal(self, filename):
+        """Sanitized filenames hold no '..' sequence or path separator."""
+        result = InputSanitizer().sanitize_filename(filename)
+        assert ".." not in result
+        assert "/" not in result and "\\" not in result
+        assert result
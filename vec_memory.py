@@ -2,6 +2,9 @@
 import os
 import uuid
 import time
+from array import array
+from collections import OrderedDict
+from threading import Lock
 from typing import List, Tuple, Dict, Any
 
 from openai import OpenAI
@@ -13,6 +16,12 @@ from keyword_search import get_keyword_index
 EMBED_MODEL = os.getenv("EMBED_MODEL", "text-embedding-3-small")
 EMBED_DIM = int(os.getenv("EMBED_DIM", "1536"))
 INDEX_NAME = os.getenv("PINECONE_INDEX", "cca-memories")
+# Texts per embeddings.create call / vector upsert in upsert_many
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+# In-process LRU of (model, text) -> vector shared by every embedding call
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "4096"))
+# Storage for cached vectors: "float32" (~6 KB each) or "int8" (~1.5 KB, lossy)
+VEC_DTYPE = os.getenv("VEC_DTYPE", "float32").lower()
 PINECONE_ENV = config.PINECONE_ENV
 
 # Initialize clients only if config is valid
@@ -40,8 +49,40 @@ else:
     index = None
     print("⚠️  API clients not initialized due to configuration errors")
 
+_embed_cache: "OrderedDict[Tuple[str, str], Tuple[array, float | None]]" = OrderedDict()
+_embed_cache_lock = Lock()
 
-def _embed(texts: List[str], max_retries: int = 3) -> List[List[float]]:
+# Bumped on every write so result caches elsewhere can key on it
+_write_generation = 0
+
+
+def _note_write():
+    global _write_generation
+    _write_generation += 1
+
+
+def write_generation() -> int:
+    """Counter that changes whenever this process writes to the index."""
+    return _write_generation
+
+
+def _pack_vector(vec: List[float]) -> Tuple[array, float | None]:
+    """Compact a vector for the embedding cache (float32, or int8 + scale)."""
+    if VEC_DTYPE != "int8":
+        return array("f", vec), None
+    # Symmetric affine quantization: q = round(v / scale), scale = max|v| / 127
+    scale = max(map(abs, vec), default=0.0) / 127 or 1.0
+    return array("b", [round(v / scale) for v in vec]), scale
+
+
+def _unpack_vector(packed: Tuple[array, float | None]) -> List[float]:
+    values, scale = packed
+    if scale is None:
+        return values.tolist()
+    return [q * scale for q in values]
+
+
+def _embed_uncached(texts: List[str], max_retries: int = 3) -> List[List[float]]:
     """Create embeddings with retry logic."""
     if not texts:
         return []
@@ -65,6 +106,50 @@ def _embed(texts: List[str], max_retries: int = 3) -> List[List[float]]:
     return []
 
 
+def _embed(texts: List[str], max_retries: int = 3) -> List[List[float]]:
+    """Create embeddings, reusing cached vectors and requesting only the misses."""
+    if not texts:
+        return []
+    
+    out: List[List[float] | None] = [None] * len(texts)
+    misses: Dict[str, List[int]] = {}
+    with _embed_cache_lock:
+        for i, text in enumerate(texts):
+            key = (EMBED_MODEL, text)
+            cached = _embed_cache.get(key)
+            if cached is None:
+                misses.setdefault(text, []).append(i)
+            else:
+                _embed_cache.move_to_end(key)
+                out[i] = _unpack_vector(cached)
+    
+    if misses:
+        miss_texts = list(misses)
+        vecs = _embed_uncached(miss_texts, max_retries)
+        with _embed_cache_lock:
+            for text, vec in zip(miss_texts, vecs):
+                for i in misses[text]:
+                    out[i] = vec
+                if EMBED_CACHE_SIZE > 0:
+                    _embed_cache[(EMBED_MODEL, text)] = _pack_vector(vec)
+            while len(_embed_cache) > EMBED_CACHE_SIZE:
+                _embed_cache.popitem(last=False)
+    
+    return out
+
+
+def _upsert_vectors(vectors: List[Dict[str, Any]], max_retries: int = 3):
+    """index.upsert with retry logic."""
+    for attempt in range(max_retries):
+        try:
+            index.upsert(vectors=vectors)
+            return
+        except Exception as e:
+            if attempt == max_retries - 1:
+                raise RuntimeError(f"Failed to upsert after {max_retries} attempts: {str(e)}")
+            time.sleep(0.5 * (attempt + 1))
+
+
 # --- public API ---
 
 
@@ -81,17 +166,8 @@ def upsert_note(text: str, meta: Dict[str, Any] | None = None) -> str:
         vec = _embed([text.strip()])[0]
         
         # Retry upsert operation for vector database
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                index.upsert(
-                    vectors=[{"id": _id, "values": vec, "metadata": {"text": text.strip(), **(meta or {})}}]
-                )
-                break
-            except Exception as e:
-                if attempt == max_retries - 1:
-                    raise RuntimeError(f"Failed to upsert note after {max_retries} attempts: {str(e)}")
-                time.sleep(0.5 * (attempt + 1))
+        _upsert_vectors([{"id": _id, "values": vec, "metadata": {"text": text.strip(), **(meta or {})}}])
+        _note_write()
         
         # Add to keyword index
         try:
@@ -110,40 +186,69 @@ def upsert_note(text: str, meta: Dict[str, Any] | None = None) -> str:
         raise RuntimeError(error_msg)
 
 
-def upsert_many(chunks: List[str], meta: Dict[str, Any]) -> List[str]:
+def upsert_many(
+    chunks: List[str],
+    meta: Dict[str, Any],
+    batch_size: int | None = None,
+    chunk_meta: List[Dict[str, Any]] | None = None,
+) -> List[str]:
+    """
+    Add many chunks, issuing one embedding request and one upsert per batch.
+    
+    ``chunk_meta`` optionally carries per-chunk fields (e.g. page number)
+    that are merged over the shared ``meta``. Each upsert is retried like
+    upsert_note's; if a batch still fails, earlier batches stay stored.
+    """
     if not chunks:
         return []
+    if chunk_meta is not None and len(chunk_meta) != len(chunks):
+        raise ValueError("chunk_meta must have one entry per chunk")
     ids: List[str] = []
-    B = 100
+    B = max(1, batch_size or EMBED_BATCH_SIZE)
     keyword_index = get_keyword_index()
     
     for i in range(0, len(chunks), B):
         batch = chunks[i : i + B]
+        if chunk_meta is None:
+            metas = [meta] * len(batch)
+        else:
+            metas = [{**meta, **m} for m in chunk_meta[i : i + B]]
         vecs = _embed(batch)
         batch_ids = [str(uuid.uuid4()) for _ in batch]
-        index.upsert(
-            vectors=[
-                {"id": bi, "values": v, "metadata": {"text": t, **meta}}
-                for bi, v, t in zip(batch_ids, vecs, batch)
-            ]
-        )
+        _upsert_vectors([
+            {"id": bi, "values": v, "metadata": {"text": t, **m}}
+            for bi, v, t, m in zip(batch_ids, vecs, batch, metas)
+        ])
+        _note_write()
         
         # Add to keyword index
-        for bi, t in zip(batch_ids, batch):
+        for bi, t, m in zip(batch_ids, batch, metas):
             try:
-                keyword_index.add_document(bi, t, meta)
+                keyword_index.add_document(bi, t, m)
             except Exception as e:
                 print(f"Warning: Failed to add document {bi} to keyword index: {e}")
-            append_log("upsert", {"id": bi, "meta": meta, "len": len(t)})
+            append_log("upsert", {"id": bi, "meta": m, "len": len(t)})
         
         ids.extend(batch_ids)
     return ids
 
 
+def embed_texts(texts: List[str]) -> List[List[float]]:
+    """Embed texts in one request, e.g. to precompute vectors for fixed strings."""
+    return _embed(texts)
+
+
 def search(query: str, k: int = 5) -> List[Tuple[str, str, Dict[str, Any]]]:
     """Return [(id, text, metadata)]"""
     qv = _embed([query])[0]
-    res = index.query(vector=qv, top_k=max(1, k), include_metadata=True)
+    return search_by_vector(qv, k)
+
+
+def search_by_vector(
+    vector: List[float], k: int = 5
+) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """Return [(id, text, metadata)] for an already-embedded query."""
+    res = index.query(vector=vector, top_k=max(1, k), include_metadata=True)
     out: List[Tuple[str, str, Dict[str, Any]]] = []
     for m in getattr(res, "matches", []):
         meta = dict(getattr(m, "metadata", {}) or {})
@@ -201,6 +306,7 @@ def delete_by_ids(ids: List[str], namespace: str | None = None) -> Dict[str, Any
     try:
         # Delete from vector index
         index.delete(ids=ids, namespace=namespace)
+        _note_write()
         
         # Delete from keyword index
         keyword_index = get_keyword_index()
@@ -340,6 +446,7 @@ def reset_all():
             print("Trying fallback method: delete all vectors")
             index.delete(delete_all=True)
             print("Fallback deletion completed")
+        _note_write()
         
         # Clear keyword index
         try: